@@ -1,63 +1,146 @@
+import os
 import sys
 import json
+import argparse
 import print_utils
 import ai
+import batch
+import beam
+import cache
+import heuristics
+import loader
+import stats
+from solvers import SOLVERS, DEFAULT_SOLVER, solve
 
-BOARD_SIZE = 8
-EMPTY_CELL = ''
-WHITE_PIECE = 'w'
-BLACK_PIECE = 'b'
-
-
-def make_board_dict(data):
-    # make empty board
-    board_dict = {}
-    for x in range(BOARD_SIZE):
-        for y in range(BOARD_SIZE):
-            board_dict[(x, y)] = get_square_data(data, x, y)
-    return board_dict
-
-def get_square_data(data, x, y):
-    # return string of square contents (e.g. '4b') from coordinates x, y
-    # e.g. if a square at (1, 3) is occupied by 3 white pieces, get_square_data(data, 1, 3) returns '3w'
-    # return '' if nothing in the given coordinates
-    for colour in data:
-        for stack in data[colour]:
-            if (stack[1], stack[2]) == (x, y):
-                # found a stack with those coordinates, return number in stack and the first letter of the colour
-                return str(stack[0]) + colour[0]
-    # nothing found
-    return ''
-
-
-def make_state_dict(data, colour):
-    # input is json data and a colour 'w' or 'b', for white or black
-    # return a dict of stack location coordinates as a key with n_pieces as the value
-    # a return example is: {(3, 2): 1, (0, 1): 5, (0, 2): 6}
-    stacks = {}
-    for x in range(BOARD_SIZE):
-        for y in range(BOARD_SIZE):
-            square = get_square_data(data, x, y)
-            if len(square) > 0:  # not an empty square
-                if colour in square:
-                    # just add the number of pieces in the stack as value
-                    stacks[(x, y)] = int(square[:-1])
-    return stacks
+# the solvers that can stop at a time or node limit (they're all A*), and the weight each puts on the heuristic
+ANYTIME_SOLVERS = {'astar': 1, 'astar-sym': 1, 'weighted': ai.DEFAULT_WEIGHT, 'greedy': None}
 
 
-def main():
-    with open(sys.argv[1]) as file:
-        data = json.load(file)
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Find a winning action sequence for a board")
+    parser.add_argument('board', help="JSON file with the white and black stacks, or a directory or glob of them, "
+                                      "or a .jsonl file with one board per line, to solve in batch mode, printing "
+                                      "one JSON line of results per board")
+    parser.add_argument('--solver', default=DEFAULT_SOLVER, choices=list(SOLVERS),
+                        help="search algorithm, idastar uses memory linear in the solution length (default: %(default)s)")
+    parser.add_argument('--heuristic', default=heuristics.DEFAULT_ESTIMATOR, choices=list(heuristics.ESTIMATORS),
+                        help="heuristic estimator for the A* search (default: %(default)s)")
+    parser.add_argument('--compare-heuristics', action='store_true',
+                        help="solve the board with every heuristic and print their metrics as JSON")
+    parser.add_argument('--stats', metavar='FILE',
+                        help="time the search and write its stats (node counts, frontier size, time spent in "
+                             "successors, booms and the heuristic) to FILE as JSON")
+    parser.add_argument('--profile', metavar='FILE', nargs='?', const='',
+                        help="run the search under cProfile and print the most expensive calls, "
+                             "saving the raw profile to FILE if given")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="batch mode or the parallel solver: number of worker processes (default: one per core)")
+    parser.add_argument('--timeout', type=float, default=None,
+                        help="batch mode: seconds to spend on each board before giving up on it")
+    parser.add_argument('--cache', metavar='FILE',
+                        help="SQLite file of solved positions to answer repeated boards from and store new answers in")
+    parser.add_argument('--cache-size', type=int, default=cache.DEFAULT_MAX_ENTRIES,
+                        help="most positions to keep in the cache, the least recently used go first "
+                             "(default: %(default)s)")
+    parser.add_argument('--weight', type=float,
+                        help="weighted solver: how much more than the path so far to weigh the heuristic, higher "
+                             "finds a win faster but a longer one (default: {})".format(ai.DEFAULT_WEIGHT))
+    parser.add_argument('--beam-width', type=int,
+                        help="beam solver: states kept at each depth (default: {})".format(beam.DEFAULT_WIDTH))
+    parser.add_argument('--time-limit', type=float, metavar='SECONDS',
+                        help="stop the A* search after SECONDS and print the best plan found so far")
+    parser.add_argument('--node-limit', type=int, metavar='N',
+                        help="stop the A* search after expanding N nodes and print the best plan found so far")
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help="with a time or node limit: carry on the search saved in FILE if there is one, "
+                             "and save it there when the limit is reached")
+    args = parser.parse_args(argv)
+    if args.checkpoint and args.time_limit is None and args.node_limit is None:
+        parser.error("--checkpoint needs --time-limit or --node-limit")
+    if (args.time_limit is not None or args.node_limit is not None) and args.solver not in ANYTIME_SOLVERS:
+        parser.error("--time-limit and --node-limit only work with the {} solvers".format(', '.join(ANYTIME_SOLVERS)))
+    if args.weight is not None and args.solver != 'weighted':
+        parser.error("--weight only works with the weighted solver")
+    if args.beam_width is not None and args.solver != 'beam':
+        parser.error("--beam-width only works with the beam solver")
+    return args
+
+
+def solver_options(args):
+    """the keyword arguments for the solver from the command line, see solvers.solve"""
+    options = {}
+    if args.weight is not None:
+        options['weight'] = args.weight
+    if args.beam_width is not None:
+        options['width'] = args.beam_width
+    if args.solver == 'parallel' and args.workers is not None:
+        options['workers'] = args.workers
+    return options
+
+
+def run_anytime(args, init_state, estimator, search_stats, solution_cache):
+    """A* within the time and node limits, carrying on from the checkpoint if there is one and saving the search
+    there if it runs out of budget. Returns the win, or the best partial plan if it hasn't found one yet"""
+    use_symmetry = args.solver == 'astar-sym'
+    weight = ANYTIME_SOLVERS[args.solver] if args.weight is None else args.weight
+    if args.checkpoint and os.path.exists(args.checkpoint):
+        try:
+            search = ai.AStarSearch.load(args.checkpoint, estimator, search_stats, solution_cache)
+        except ValueError as error:
+            sys.exit("{}: {}".format(args.checkpoint, error))
+        if not search.started_from(init_state):
+            sys.exit("{} holds a search of another board, use a different checkpoint file".format(args.checkpoint))
+        if (search.use_symmetry, search.weight) != (use_symmetry, weight):
+            sys.exit("{} holds a search with another solver or weight, carry it on with the same ones or use a "
+                     "different checkpoint file".format(args.checkpoint))
+    else:
+        search = ai.AStarSearch(init_state, estimator, search_stats, use_symmetry, solution_cache, weight)
+    if search.run(args.time_limit, args.node_limit) == ai.OUT_OF_BUDGET:
+        sys.stderr.write("no win found within the limit, printing the best partial plan\n")
+    if args.checkpoint:
+        search.save(args.checkpoint)
+    return search.best_sequence()
 
-    # TODO: find and print winning action sequence
-    print_utils.print_board(make_board_dict(data))
+
+def main():
+    args = parse_args(sys.argv[1:])
+    if batch.is_batch_target(args.board):
+        if args.solver == 'parallel':
+            sys.exit("batch mode already spreads the boards over every core, use another solver")
+        unsolved = batch.run_batch(batch.find_boards(args.board), args.solver, args.heuristic,
+                                   args.workers, args.timeout, cache_path=args.cache, cache_size=args.cache_size,
+                                   options=solver_options(args))
+        sys.exit(1 if unsolved else 0)
 
     # make the initial state and the initial node
-    init_state = ai.State(make_state_dict(data, WHITE_PIECE), make_state_dict(data, BLACK_PIECE))
+    init_state = loader.load_file(args.board)
+    print_utils.print_board(loader.board_dict(init_state))
     init_node = ai.Node(init_state)
 
+    if args.compare_heuristics:
+        print(json.dumps(heuristics.compare_estimators(init_state), indent=4))
+        return
+
+    estimator = heuristics.get_estimator(args.heuristic)
+    search_stats = stats.SearchStats(timing=args.stats is not None)
+    solution_cache = cache.SolutionCache(args.cache, args.cache_size) if args.cache else None
+    try:
+        if args.time_limit is not None or args.node_limit is not None:
+            sequence = run_anytime(args, init_state, estimator, search_stats, solution_cache)
+        elif args.profile is not None:
+            sequence = stats.profile(solve, args.solver, init_node, estimator, search_stats, cache=solution_cache,
+                                     path=args.profile or None, **solver_options(args))
+        else:
+            sequence = solve(args.solver, init_node, estimator, search_stats, solution_cache, **solver_options(args))
+    finally:
+        if solution_cache is not None:
+            solution_cache.close()
+    if args.stats is not None:
+        search_stats.dump(args.stats)
+
     # print the winning move sequence
-    print(ai.get_winning_sequence(init_node))
+    print_utils.print_sequence(sequence)
+
 
 if __name__ == '__main__':
     main()
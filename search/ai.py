@@ -1,22 +1,23 @@
 import heapq
-import sys
-import copy
+import pickle
+import time
+from array import array
 
-LEFT = (-1, 0)
-RIGHT = (1, 0)
-UP = (0, 1)
-DOWN = (0, -1)
-MOVE_DIRECTIONS = [LEFT, RIGHT, UP, DOWN]
-MOVE = 'MOVE'
-BOOM = 'BOOM'
+import heuristics
+import symmetry
+from stats import SearchStats
+from engine import State, MOVE, BOOM, SQUARE_BITS, SQUARE_COORDS, dest_square, decode_action
 
-# values for the heuristic
-LOST_GAME = sys.maxsize
-WIN_GAME = -sys.maxsize
+# the estimator used when a search isn't given one, see heuristics.py for the others
+heuristic = heuristics.get_estimator()
+# the weight the weighted solver puts on the heuristic, see priority
+DEFAULT_WEIGHT = 2
 
 
 class Node:
-    def __init__(self, state, parent=None, move=None, depth=0, h=0, f=0):
+    __slots__ = ('state', 'parent', 'move', 'depth', 'h', 'f')
+
+    def __init__(self, state, parent=None, move=None, depth=0, h=0):
         """Node class for searching with A*"""
         # the state associated with this node
         self.state = state
@@ -27,274 +28,359 @@ class Node:
         # the depth of the current node
         self.depth = depth
         # a* value: f(n) = h(n)<-heuristic + g(n)<-depth
-        self.h = heuristic(state)
-        self.f = h + depth
+        self.h = h
+        self.f = self.h + depth
 
     # manually define '<' the less than operator, or else heapq() functions kick up a stink
+    # ties on f go to the node with the lower h, i.e. the one closer to winning
     def __lt__(self, other):
-        if self.f < other.f:
-            return True
-        return False
-
-
-class State:
-    """State class to be associated with 1 node"""
-
-    def __init__(self, white_stacks, black_stacks):
-        # eg. white_stacks = {(3, 2): 1, (0, 1): 5, (0, 2): 6}
-        self.white_stacks = white_stacks
-        self.black_stacks = black_stacks
-
-    def __eq__(self, other):
-        return bool((self.white_stacks == other.white_stacks) and (self.black_stacks == other.black_stacks))
-
-    def total_white(self):
-        return sum(self.white_stacks.values())
-
-    def total_black(self):
-        return sum(self.black_stacks.values())
-
-
-def heuristic(state):
-    if State.total_black(state) == 0:
-        return WIN_GAME
-    if State.total_white(state) == 0:
-        return LOST_GAME
-    # else, the heuristic is the number of enemy pieces on the board, lower is better
-    return State.total_black(state)
-
-
-def get_next_move(start_node, budget=100):
-    # make a list of all the nodes we explore
-    explored_nodes = []
-
-    # make the frontier priority queue with only the start node
-    frontier = []
-    heapq.heappush(frontier, (0, start_node))
-
-    # each action takes the form: (score, (stack_location, is_boom_action, n_pieces, move_direction, n_steps))
-    # score will be the number of enemy pieces left on board, ties broken randomly
-    best_action = ()
-    # while there are still nodes in the frontier and we're not over budget, expand more
-    while len(frontier) > 0 and len(explored_nodes) <= budget:
-        current_node = heapq.heappop(frontier)[1]
-        explored_nodes += [current_node]
-
-        # go through the list of applicable BOOM actions and try them
-        for stack in current_node.state.white_stacks.items():
-            child_node = boom_action(current_node, stack[0])
-            # check if we're not adding an already visited state
-            # if child_node.state not in [e.state for e in explored_nodes]:
-            explored_nodes += [child_node]
-            heapq.heappush(frontier, (child_node.f, child_node))
-
-        # go through the list of applicable MOVE actions and try them
-        # go through the squares where we have a stack
-        for stack in current_node.state.white_stacks.items():
-            # iterate through each possible number of pieces to move from our stack at the current occupied_square
-            for n_pieces in range(1, stack[1] + 1):
-                # possible moving directions
-                for move_direction in MOVE_DIRECTIONS:
-                    # number of squares to move n_pieces from current stack, 1 <= n_steps <= n_pieces
-                    for n_steps in range(1, stack[1] + 1):
-                        # check if moving n_steps in move_direction from current stack is a legal move (i.e. not out of bounds and not landing on an enemy piece)
-                        if is_legal_move(current_node.state.black_stacks, stack[0], move_direction, n_steps):
-                            # make a child node that is the result of applying this move action to the current_node
-                            child_node = boom_action(current_node, stack[0], n_pieces, move_direction, n_steps)
-                            # make sure we're not duplicating states
-                            # if child_node.state not in [e.state for e in explored_nodes]:
-                            explored_nodes += [child_node]
-                            heapq.heappush(frontier, (child_node.f, child_node))
-
-
-def get_winning_sequence(start_node):
-    # make a list of all the nodes we explore
-    explored_nodes = []
-    # make the frontier priority queue with only the start node
-    frontier = []
-    heapq.heappush(frontier, (0, start_node))
-    times_through_loop = 0  # for debugging
-    # print("Loop count: " + str(times_through_loop) + str(frontier))  # for debugging
-    winning_node = None
-
-    # find the winning node
-    while len(frontier) > 0:
-        current_node = heapq.heappop(frontier)[1]
-        explored_nodes += [current_node]
-
-        # go through the list of applicable BOOM actions and try them
-        for stack in current_node.state.white_stacks.items():
-            child_node = boom_action(current_node, stack[0])
-            # check if we're not adding an already visited state
-            if child_node.state not in [e.state for e in explored_nodes]:
-                explored_nodes += [child_node]
-                heapq.heappush(frontier, (child_node.f, child_node))
-            # check if we just won
-            if State.total_black(child_node.state) == 0:
-                winning_node = child_node
+        if self.f != other.f:
+            return self.f < other.f
+        return self.h < other.h
+
+
+class NodeStore:
+    """All the nodes of one search, kept as parallel arrays indexed by node id instead of one object per node.
+    Each state gets a single node id and is stored once, as its packed State.key() int shared with the
+    transposition table, and only unpacked back into a State when its node is expanded.
+
+    When searching up to symmetry the key stored is the state's canonical key (see symmetry.canonical_key), so a
+    node's state and the move into it are on the canonical board, and syms says which symmetry took the board the
+    parent's move produced to the canonical one. path uses them to turn the moves back round onto the real board"""
+    __slots__ = ('keys', 'parents', 'moves', 'depths', 'hs', 'syms', 'ids')
+
+    def __init__(self):
+        self.keys = []
+        # parent node id, -1 for the start node
+        self.parents = array('i')
+        # the encoded action that got us here from the parent, see engine.encode_move
+        self.moves = array('i')
+        self.depths = array('i')
+        self.hs = array('i')
+        self.syms = array('b')
+        # transposition table: state key -> its node id
+        self.ids = {}
+
+    def __len__(self):
+        return len(self.keys)
+
+    def state(self, node):
+        return State.from_key(self.keys[node])
+
+    def add(self, key, parent, move, depth, h, sym=symmetry.IDENTITY):
+        """store a node for a state we haven't seen before and return its id"""
+        node = len(self.keys)
+        self.keys.append(key)
+        self.parents.append(parent)
+        self.moves.append(move)
+        self.depths.append(depth)
+        self.hs.append(h)
+        self.syms.append(sym)
+        self.ids[key] = node
+        return node
+
+    def reparent(self, node, parent, move, depth, sym=symmetry.IDENTITY):
+        """record a shorter path to an existing node"""
+        self.parents[node] = parent
+        self.moves[node] = move
+        self.depths[node] = depth
+        self.syms[node] = sym
+
+    def path(self, node, last_moves=()):
+        """rebuild the list of action tuples that leads from the start node to node, then the encoded last_moves
+        (made from node's state) if given"""
+        nodes = []
+        while node != -1:
+            nodes.append(node)
+            node = self.parents[node]
+        nodes.reverse()
+        # the symmetry taking the board of the node we're at back to the real board
+        to_real = symmetry.INVERSES[self.syms[nodes[0]]]
+        moves_made = []
+        for node in nodes[1:]:
+            moves_made.append(decode_action(symmetry.transform_action(self.moves[node], to_real)))
+            to_real = symmetry.COMPOSE[symmetry.INVERSES[self.syms[node]]][to_real]
+        moves_made += [decode_action(symmetry.transform_action(move, to_real)) for move in last_moves]
+        return moves_made
+
+
+# what AStarSearch.run stopped on
+SOLVED = 'solved'
+NO_SOLUTION = 'no-solution'
+OUT_OF_BUDGET = 'budget'
+
+
+def priority(depth, h, weight=1):
+    """where a node goes in the frontier: f = depth + weight * h, so weights above 1 trust the heuristic more and
+    find a win sooner but not always the shortest (at most weight times longer with an admissible heuristic).
+    A weight of None is greedy best-first, ordering by h alone and going deeper first among states with the same h"""
+    if weight is None:
+        return h, -depth
+    return depth + weight * h
+
+
+class AStarSearch:
+    """One A* search from a state that can be stopped at a time or node budget and carried on later, see
+    get_winning_sequence for the search itself. Between runs everything needed to carry on (the node store,
+    frontier and closed set) stays on the object, and save/load put it in a file to resume from in another process"""
+
+    def __init__(self, state, estimator=None, stats=None, use_symmetry=False, cache=None, weight=1):
+        self.estimator = estimator or heuristic
+        self.weight = weight
+        self.stats = stats if stats is not None else SearchStats()
+        self.use_symmetry = use_symmetry
+        self.cache = cache
+        self.state_key = symmetry.canonical_key if use_symmetry else symmetry.plain_key
+        self.evaluate = self.stats.heuristic_function(self.estimator)
+        self.store = NodeStore()
+        # the real board's key, the store's start key is the canonical one with use_symmetry
+        self.start_key = state.key()
+        # closed set of the node ids we have already expanded
+        self.explored = set()
+        # the frontier priority queue, entries are (f, h, node id)
+        self.frontier = []
+        self.status = None
+        self.winning_path = None
+        # the shortest win through a state found in the cache: (its length, node id, encoded actions from the node)
+        self.cached_win = None
+        # the node with the lowest (h, depth) seen so far, the end of the best partial plan
+        self.best_node = None
+        h = self.evaluate(state)
+        if h == heuristics.LOST_GAME:
+            # white has nothing to win with, the empty frontier makes run report NO_SOLUTION straight away
+            self.stats.dead_ends += 1
+            return
+        start_key, start_sym = self.state_key(state)
+        start = self.store.add(start_key, -1, 0, 0, h, start_sym)
+        self.frontier.append((priority(0, h, weight), h, start))
+        self.best_node = start
+
+    def run(self, time_limit=None, node_limit=None):
+        """search on until the search is over or time_limit seconds or node_limit more expansions have gone by.
+        Returns SOLVED (the win is in winning_path), NO_SOLUTION or OUT_OF_BUDGET (call run again to carry on)"""
+        if self.status in (SOLVED, NO_SOLUTION):
+            return self.status
+        stats = self.stats
+        stats.start()
+        deadline = None if time_limit is None else time.perf_counter() + time_limit
+        last_node = None if node_limit is None else stats.nodes_expanded + node_limit
+        make = stats.make_function()
+        store, frontier, explored, cache = self.store, self.frontier, self.explored, self.cache
+        self.status = None
+
+        # find the winning node
+        while len(frontier) > 0:
+            if (last_node is not None and stats.nodes_expanded >= last_node) or \
+                    (deadline is not None and time.perf_counter() >= deadline):
+                self.status = OUT_OF_BUDGET
+                break
+            f, h, current = heapq.heappop(frontier)
+            # skip stale frontier entries, the node was already expanded or reached by a shorter path since
+            if current in explored or f != priority(store.depths[current], h, self.weight):
+                continue
+            # f never overestimates, so nothing left on the frontier can beat the cached win any more. Weighted
+            # searches aren't after the shortest win, so they take the first one
+            if self.cached_win is not None and (self.weight != 1 or f >= self.cached_win[0]):
+                heapq.heappush(frontier, (f, h, current))
+                break
+            explored.add(current)
+            state = store.state(current)
+            depth = store.depths[current] + 1
+            if cache is not None:
+                entry = cache.lookup(state, exact=True)
+                if entry is not None:
+                    # an exact entry is a shortest win from here (or proof there isn't one), no need to expand further
+                    if entry[0] is not None and (self.cached_win is None or
+                                                 depth - 1 + len(entry[0]) < self.cached_win[0]):
+                        self.cached_win = (depth - 1 + len(entry[0]), current, entry[0])
+                    continue
+
+            # try every legal action, making and unmaking it on state instead of copying the board for each child
+            for action in stats.successors(state):
+                undo = make(state, action)
+                stats.nodes_generated += 1
+                # check if we just won
+                if not state.black:
+                    self.winning_path = store.path(current, [action])
+                    break
+                node = push_child(store, frontier, explored, self.evaluate, state, current, action, depth, stats,
+                                  self.state_key, self.weight)
+                if node is not None and (store.hs[node], store.depths[node]) < \
+                        (store.hs[self.best_node], store.depths[self.best_node]):
+                    self.best_node = node
+                state.unmake(undo)
+            stats.nodes_expanded += 1
+            stats.max_frontier = max(stats.max_frontier, len(frontier))
+            # break the while loop, because we've already found the win
+            if self.winning_path is not None:
                 break
-        # break the while loop, because we've already found the winning_node
-        if winning_node is not None:
-            break
-        # go through the list of applicable MOVE actions and try them
-        # go through the squares where we have a stack
-        for stack in current_node.state.white_stacks.items():
-            # iterate through each possible number of pieces to move from our stack at the current occupied_square
-            for n_pieces in range(1, stack[1] + 1):
-                # possible moving directions
-                for move_direction in MOVE_DIRECTIONS:
-                    # number of squares to move n_pieces from current stack, 1 <= n_steps <= n_pieces
-                    for n_steps in range(1, stack[1] + 1):
-                        # check if moving n_steps in move_direction from current stack is a legal move (i.e. not out of bounds and not landing on an enemy piece)
-                        if is_legal_move(current_node.state.black_stacks, stack[0], move_direction, n_steps):
-                            # make a child node that is the result of applying this move action to the current_node
-                            child_node = apply_action(current_node, stack[0], n_pieces, move_direction, n_steps)
-                            # make sure we're not duplicating states
-                            if child_node.state not in [e.state for e in explored_nodes]:
-                                explored_nodes += [child_node]
-                                heapq.heappush(frontier, (child_node.f, child_node))
-        times_through_loop += 1
-        # print("Loop count: " + str(times_through_loop) + str(frontier))  # for debugging
-
-    # we have the winning_node, now we calculate the sequence of moves made to get to that node
-    moves_made = []
-    curr = winning_node
-    while curr.parent is not None:
-        moves_made += [curr.move]
-        curr = curr.parent
-    return list(reversed(moves_made))
-
-
-def is_legal_move(enemy_stack_locations, moving_stack_location, move_direction, n_steps):
+
+        if self.status is None:
+            if self.winning_path is None and self.cached_win is not None:
+                self.winning_path = store.path(self.cached_win[1], self.cached_win[2])
+            self.status = NO_SOLUTION if self.winning_path is None else SOLVED
+            stats.finish(self.winning_path)
+            self.estimator.record(stats.nodes_expanded, stats.solution_length)
+        else:
+            stats.finish(None)
+        return self.status
+
+    def best_partial(self):
+        """the moves to the state with the lowest heuristic found so far (the shallowest of those if there's a tie),
+        for when the search ran out of budget before finding a win"""
+        return self.store.path(self.best_node)
+
+    def best_sequence(self):
+        """the win if there is one, otherwise the best partial plan (None if the search proved there's no win)"""
+        if self.status == SOLVED:
+            return self.winning_path
+        if self.status == NO_SOLUTION:
+            return None
+        return self.best_partial()
+
+    def __getstate__(self):
+        # the estimator, stats and cache belong to whoever runs the search, see load
+        return {'estimator': self.estimator.name, 'use_symmetry': self.use_symmetry, 'weight': self.weight,
+                'start_key': self.start_key, 'store': self.store, 'explored': self.explored,
+                'frontier': self.frontier, 'status': self.status, 'winning_path': self.winning_path,
+                'cached_win': self.cached_win, 'best_node': self.best_node}
+
+    def __setstate__(self, saved):
+        # checkpoints from before start_key was saved can't say what board they're for
+        self.start_key = None
+        self.__dict__.update(saved)
+        self.state_key = symmetry.canonical_key if self.use_symmetry else symmetry.plain_key
+
+    def started_from(self, state):
+        """whether this is a search from state"""
+        return self.start_key == state.key()
+
+    def save(self, path):
+        """write the search to path so load can carry it on later"""
+        with open(path, 'wb') as file:
+            pickle.dump(self, file, pickle.HIGHEST_PROTOCOL)
+
+    @staticmethod
+    def load(path, estimator=None, stats=None, cache=None):
+        """read back a search written by save. The estimator defaults to a new one of the kind it was started with,
+        raises ValueError if it's given one of another kind"""
+        with open(path, 'rb') as file:
+            search = pickle.load(file)
+        if estimator is not None and estimator.name != search.estimator:
+            raise ValueError("the search was started with the {} heuristic, not {}".format(
+                search.estimator, estimator.name))
+        search.estimator = estimator or heuristics.get_estimator(search.estimator)
+        search.stats = stats if stats is not None else SearchStats()
+        search.cache = cache
+        search.evaluate = search.stats.heuristic_function(search.estimator)
+        return search
+
+
+def get_next_move(start_node, budget=100, time_limit=None, estimator=None):
+    """the action to play next from start_node's state: the first action of a win if one is found within budget
+    node expansions (and time_limit seconds, if given), otherwise of the plan that gets closest to winning.
+    None if there's no win or nothing to move"""
+    search = AStarSearch(start_node.state, estimator)
+    search.run(time_limit, budget)
+    sequence = search.best_sequence()
+    return sequence[0] if sequence else None
+
+
+def get_best_sequence(start_node, estimator=None, stats=None, time_limit=None, node_limit=None, use_symmetry=False,
+                      cache=None, weight=1):
+    """anytime A*: search from start_node for at most time_limit seconds and node_limit node expansions, returning
+    (sequence, status). status is SOLVED with the win, NO_SOLUTION with None, or OUT_OF_BUDGET with the best partial
+    plan found, ranked by the estimator. To carry on an interrupted search use AStarSearch directly"""
+    search = AStarSearch(start_node.state, estimator, stats, use_symmetry, cache, weight)
+    status = search.run(time_limit, node_limit)
+    return search.best_sequence(), status
+
+
+def get_winning_sequence(start_node, estimator=None, stats=None, use_symmetry=False, cache=None, weight=1):
+    """A* search from start_node for the shortest sequence of actions that wins, scored by estimator
+    (ai.heuristic by default). Returns the list of moves, or None if there is no way to win.
+    If stats (a stats.SearchStats) is given it's filled in as the search goes. With use_symmetry, rotations and
+    reflections of a state we have already seen count as seen too. With a cache (cache.SolutionCache), states it
+    knows the exact distance to win for aren't expanded, the cached win is used from there instead.
+    weight trades the shortest win for a faster search, see priority"""
+    search = AStarSearch(start_node.state, estimator, stats, use_symmetry, cache, weight)
+    search.run()
+    return search.winning_path
+
+
+def push_child(store, frontier, explored, estimator, child, parent, move, depth, stats, state_key=symmetry.plain_key,
+               weight=1):
+    """add child to the frontier if this is the shortest path to its state we have seen, checking the closed set
+    and transposition table. child is only read here, it's stored as the key state_key gives it.
+    Returns the child's node id, or None if it wasn't added"""
+    key, sym = state_key(child)
+    node = store.ids.get(key)
+    if node is None:
+        h = estimator(child)
+        # there's no winning from a state with no white pieces left
+        if h == heuristics.LOST_GAME:
+            stats.dead_ends += 1
+            return None
+        node = store.add(key, parent, move, depth, h, sym)
+    elif node in explored or store.depths[node] <= depth:
+        stats.duplicate_hits += 1
+        return None
+    else:
+        store.reparent(node, parent, move, depth, sym)
+    h = store.hs[node]
+    heapq.heappush(frontier, (depth + h if weight == 1 else priority(depth, h, weight), h, node))
+    return node
+
+
+def is_legal_move(enemy_mask, moving_square, move_direction, n_steps):
     """ check if moving n_steps in move_direction from current stack is a legal move (i.e. not out of bounds and not landing on an enemy piece)"""
-    dest_square = calculate_dest_square(moving_stack_location, move_direction, n_steps)
-    return bool((dest_square[0] in range(0, 8)) and (dest_square[1] in range(0, 8)) and (
-            dest_square not in enemy_stack_locations))
+    dest = calculate_dest_square(moving_square, move_direction, n_steps)
+    return dest is not None and not enemy_mask & SQUARE_BITS[dest]
 
 
-def calculate_dest_square(moving_stack_location, move_direction, n_steps):
-    return (
-        moving_stack_location[0] + n_steps * move_direction[0], moving_stack_location[1] + n_steps * move_direction[1])
+def calculate_dest_square(moving_square, move_direction, n_steps):
+    """the square n_steps away in MOVE_DIRECTIONS[move_direction], None if it's off the board"""
+    return dest_square(moving_square, move_direction, n_steps)
 
 
-def apply_action(base_node, stack, n_pieces, move_direction, n_steps):
+def apply_action(base_node, stack, n_pieces, move_direction, n_steps, estimator=None):
     """apply a move action to the given base node by moving n_pices from stack n_steps in move_direction"""
-    dest_square = calculate_dest_square(stack, move_direction, n_steps)
+    dest = calculate_dest_square(stack, move_direction, n_steps)
 
-    # make a new node that is a copy of the base_node
-    new_node = Node(State(base_node.state.white_stacks.copy(), base_node.state.black_stacks.copy()))
+    # make a new node whose state is base_node's state with the move executed on it
+    new_node = Node(base_node.state.move(n_pieces, stack, dest))
     # adjust new_node fields according to how our move will change them:
     # parent node of the new_node is the base_node
     new_node.parent = base_node
     # new_node depth is parent depth + 1
     new_node.depth = base_node.depth + 1
     # store the move which got us to new_node
-    new_node.move = (MOVE, n_pieces, stack, dest_square)
-
-    # execute move on new_node state max is doing this bit
-    # move the pieces from the stack to a new stack
-    # print(new_node.move)
-    new_node.state.white_stacks[stack] -= n_pieces
-    if new_node.state.white_stacks[stack] == 0:
-        new_node.state.white_stacks.pop(stack)
-    if dest_square in new_node.state.white_stacks:
-        # there were already a stack to the square we were moving, just add those number of pieces
-        new_node.state.white_stacks[dest_square] += n_pieces
-    else:
-        # we have to make a new key value pair because we made a new stack
-        new_node.state.white_stacks[dest_square] = n_pieces
+    new_node.move = (MOVE, n_pieces, SQUARE_COORDS[stack], SQUARE_COORDS[dest])
 
-    # print(new_node.state.white_stacks)
     # update the a* node values
-    new_node.h = heuristic(new_node.state)
+    new_node.h = (estimator or heuristic)(new_node.state)
     new_node.f = new_node.h + new_node.depth
 
     return new_node
 
 
-def boom_action(base_node, stack_to_boom):
-    # make a new node that is a copy of the base_node
-    new_node = Node(State(base_node.state.white_stacks.copy(), base_node.state.black_stacks.copy()))
+def boom_action(base_node, stack_to_boom, estimator=None):
+    # make a new node with the boom starting at stack_to_boom applied to base_node's state
+    new_node = Node(chain_boom(base_node.state, stack_to_boom))
     # adjust new_node fields according to how the boom change them:
     # parent node of the new_node is the base_node
     new_node.parent = base_node
     # new_node depth is parent depth + 1
     new_node.depth = base_node.depth + 1
     # store the move which got us to new_node
-    new_node.move = (stack_to_boom, BOOM)
-
-    # recursive boom at the new_node.state starting at 'stack', this updates the state
-    new_node.state = chain_boom(new_node.state, stack_to_boom)
+    new_node.move = (SQUARE_COORDS[stack_to_boom], BOOM)
 
     # update a* values and return
-    new_node.h = heuristic(new_node.state)
+    new_node.h = (estimator or heuristic)(new_node.state)
     new_node.f = new_node.h + new_node.depth
     return new_node
 
 
-# this sucks
-def recursive_boom(state, stack_to_boom):
-    # add the stack to the stacks to be removed
-    # make a boom radius from stack_to_boom
-    radius_x = [stack_to_boom[0], stack_to_boom[0], stack_to_boom[0] - 1, stack_to_boom[0] - 1,
-                stack_to_boom[0] - 1, stack_to_boom[0] + 1,
-                stack_to_boom[0] + 1, stack_to_boom[0] + 1]
-    # possible corresponding y coordinates e.g. (2,2): [1, 3, 2, 1, 3, 2, 1, 3]
-    radius_y = [stack_to_boom[1] - 1, stack_to_boom[1] + 1, stack_to_boom[1], stack_to_boom[1] - 1,
-                stack_to_boom[1] + 1, stack_to_boom[1],
-                stack_to_boom[1] - 1, stack_to_boom[1] + 1]
-    radius = list(zip(radius_x, radius_y))
-    # got a list of all the white squares where the boom radius hits a stack, if it does at all
-    white_stacks_hit = list(set(state.white_stacks.keys()).intersection(radius))
-    # check if we are booming from a white stack, remove it from the state
-    if stack_to_boom in state.white_stacks:
-        state.white_stacks.pop(stack_to_boom)
-    # go through white stacks where the boom could hit, boom at those locations
-    for stack in white_stacks_hit:
-        state = recursive_boom(state, stack)
-
-    # do the same for black stacks ...
-    black_stacks_hit = list(set(state.black_stacks.keys()).intersection(radius))
-    if stack_to_boom in state.black_stacks:
-        state.black_stacks.pop(stack_to_boom)
-    for stack in black_stacks_hit:
-        state = recursive_boom(state, stack)
-    return state
-
-
-# new boom function needs to be made
-def chain_boom(state, stack_to_boom, stacks_to_remove=None):
-    # add the stack_to_boom to the stacks_to_remove
-    if stacks_to_remove is None:
-        stacks_to_remove = set()
-    stacks_to_remove.add(stack_to_boom)
-
-    # go through all the adjacent stacks to stack_to_boom
-    # add the stack to the stacks to be removed
-    # make a boom radius from stack_to_boom
-    radius_x = [stack_to_boom[0], stack_to_boom[0], stack_to_boom[0] - 1, stack_to_boom[0] - 1,
-                stack_to_boom[0] - 1, stack_to_boom[0] + 1,
-                stack_to_boom[0] + 1, stack_to_boom[0] + 1]
-    # possible corresponding y coordinates e.g. (2,2): [1, 3, 2, 1, 3, 2, 1, 3]
-    radius_y = [stack_to_boom[1] - 1, stack_to_boom[1] + 1, stack_to_boom[1], stack_to_boom[1] - 1,
-                stack_to_boom[1] + 1, stack_to_boom[1],
-                stack_to_boom[1] - 1, stack_to_boom[1] + 1]
-    radius = list(zip(radius_x, radius_y))
-
-    # get a list of all the squares where the boom hit
-    all_stacks = list(state.white_stacks.keys()) + list(state.black_stacks.keys())
-    stacks_hit = list(set(all_stacks).intersection(radius))
-
-    # add all the stacks_stacks_hit to the stacks_to_remove set, if they havent been added before, boom them
-    for st in stacks_hit:
-        if st not in stacks_to_remove:
-            stacks_to_remove.add(st)
-            chain_boom(state, st, stacks_to_remove)
-
-    # remove stacks_to_remove from state and return state
-    for st in stacks_to_remove:
-        if st in state.white_stacks:
-            state.white_stacks.pop(st)
-        if st in state.black_stacks:
-            state.black_stacks.pop(st)
-    return state
+def chain_boom(state, stack_to_boom):
+    """the state after booming stack_to_boom, chain reactions included"""
+    return state.boom(stack_to_boom)
@@ -0,0 +1,144 @@
+"""
+Batch mode: solve every board file in a directory or glob with a pool of worker
+processes, so interpreter startup and imports are paid once per worker instead of
+once per board. One JSON line is written per board as soon as it finishes.
+"""
+
+import glob
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import ai
+import cache
+import heuristics
+import loader
+from stats import SearchStats
+from solvers import solve
+
+
+class PuzzleTimeout(Exception):
+    pass
+
+
+def is_batch_target(target):
+    """True if target names many boards (a directory, a glob pattern or a stream file) rather than one"""
+    return os.path.isdir(target) or loader.is_stream(target) or any(char in target for char in '*?[')
+
+
+def find_boards(target):
+    """the board files named by a directory (every .json, .jsonl and .ndjson file in it) or a glob pattern, sorted"""
+    if os.path.isdir(target):
+        paths = []
+        for extension in ('.json',) + loader.STREAM_EXTENSIONS:
+            paths += glob.glob(os.path.join(target, '*' + extension))
+        return sorted(paths)
+    return sorted(glob.glob(target))
+
+
+def _raise_timeout(signum, frame):
+    raise PuzzleTimeout()
+
+
+def solve_file(path, solver, heuristic, timeout=None, cache_path=None, cache_size=cache.DEFAULT_MAX_ENTRIES,
+               options=None):
+    """solve the board in path, returning a dict of the result that can be written as a JSON line.
+    Runs in the worker processes; timeout (seconds) is enforced with SIGALRM where the platform has it.
+    With a cache_path the board goes through the cache.SolutionCache in that file. options are passed on to the
+    solver, see solvers.solve"""
+    try:
+        with open(path) as file:
+            data = json.load(file)
+    except (OSError, ValueError) as error:
+        return error_result(path, solver, heuristic, '{}: {}'.format(type(error).__name__, error))
+    return solve_board(data, path, solver, heuristic, timeout, cache_path, cache_size, options)
+
+
+def solve_line(line, name, solver, heuristic, timeout=None, cache_path=None, cache_size=cache.DEFAULT_MAX_ENTRIES,
+               options=None):
+    """solve the board on one line of a stream file, the line is only parsed here in the worker"""
+    try:
+        name, data = loader.parse_line(line, name)
+    except loader.BoardError as error:
+        return error_result(name, solver, heuristic, str(error))
+    return solve_board(data, name, solver, heuristic, timeout, cache_path, cache_size, options)
+
+
+def solve_board(data, name, solver, heuristic, timeout=None, cache_path=None, cache_size=cache.DEFAULT_MAX_ENTRIES,
+                options=None):
+    """solve a board given as parsed JSON, see solve_file. name is only used to label the result"""
+    result = {'board': name, 'solver': solver, 'heuristic': heuristic}
+    estimator = heuristics.get_estimator(heuristic)
+    stats = SearchStats()
+    use_alarm = timeout and hasattr(signal, 'SIGALRM')
+    start_time = time.perf_counter()
+    solution_cache = None
+    try:
+        init_state = loader.load_state(data)
+        if cache_path:
+            solution_cache = cache.SolutionCache(cache_path, cache_size)
+        if use_alarm:
+            signal.signal(signal.SIGALRM, _raise_timeout)
+            signal.setitimer(signal.ITIMER_REAL, timeout)
+        try:
+            actions = solve(solver, ai.Node(init_state), estimator, stats, solution_cache, **(options or {}))
+        finally:
+            if use_alarm:
+                signal.setitimer(signal.ITIMER_REAL, 0)
+            if solution_cache is not None:
+                solution_cache.close()
+        result['status'] = 'solved' if actions is not None else 'no-solution'
+        result['length'] = None if actions is None else len(actions)
+        result['actions'] = actions
+    except PuzzleTimeout:
+        result['status'] = 'timeout'
+        stats.finish(None)
+    except Exception as error:
+        result['status'] = 'error'
+        result['error'] = '{}: {}'.format(type(error).__name__, error)
+    # filled in as the search goes, so these are still meaningful for searches that timed out
+    return _add_search_fields(result, time.perf_counter() - start_time, estimator.evaluations, stats)
+
+
+def error_result(name, solver, heuristic, message):
+    """the result for a board that couldn't be read, with the same keys as a solve_board error"""
+    result = {'board': name, 'solver': solver, 'heuristic': heuristic, 'status': 'error', 'error': message}
+    return _add_search_fields(result, 0.0, 0, SearchStats())
+
+
+def _add_search_fields(result, elapsed, evaluations, stats):
+    result['time'] = elapsed
+    result['evaluations'] = evaluations
+    result['nodes_expanded'] = stats.nodes_expanded
+    result['stats'] = stats.as_dict()
+    return result
+
+
+def run_batch(paths, solver, heuristic, workers=None, timeout=None, out=sys.stdout, cache_path=None,
+              cache_size=cache.DEFAULT_MAX_ENTRIES, options=None):
+    """solve every board in paths across workers processes (default: one per core), writing each result to out
+    as a JSON line in the order they finish. Stream files are read a line at a time and every line is a board.
+    With a cache_path every worker shares the cache.SolutionCache in that file.
+    Returns the number of boards that weren't solved"""
+    unsolved = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = []
+        for path in paths:
+            if not loader.is_stream(path):
+                futures.append(executor.submit(solve_file, path, solver, heuristic, timeout, cache_path,
+                                               cache_size, options))
+                continue
+            with open(path) as file:
+                for name, line in loader.iter_lines(file, path):
+                    futures.append(executor.submit(solve_line, line, name, solver, heuristic, timeout,
+                                                   cache_path, cache_size, options))
+        for future in as_completed(futures):
+            result = future.result()
+            if result['status'] != 'solved':
+                unsolved += 1
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    return unsolved
@@ -0,0 +1,68 @@
+"""
+Beam search: a breadth-first search that only keeps the width most promising
+states (lowest heuristic) of each depth to expand next. Memory and time per depth
+are bounded by the width, so it finds a win on boards A* can't finish, but it can
+miss wins (and the shortest one) that go through states it dropped, so None from
+it doesn't prove there's no win.
+"""
+
+import heapq
+
+import heuristics
+from stats import SearchStats
+
+DEFAULT_WIDTH = 64
+
+
+def get_winning_sequence(start_node, estimator=None, stats=None, width=DEFAULT_WIDTH):
+    """beam search from start_node, keeping the width best states by estimator at each depth. Returns moves in the
+    same form as ai.get_winning_sequence, or None if the beam runs dry, and fills in stats like it does"""
+    import ai
+
+    estimator = estimator or ai.heuristic
+    stats = stats if stats is not None else SearchStats()
+    stats.start()
+    make = stats.make_function()
+    evaluate = stats.heuristic_function(estimator)
+    # every state the search has seen, at any depth, so no state goes in the beam twice
+    store = ai.NodeStore()
+    h = evaluate(start_node.state)
+    beam = []
+    if h == heuristics.LOST_GAME:
+        # white has nothing to win with, the empty beam ends the search straight away
+        stats.dead_ends += 1
+    else:
+        beam.append(store.add(start_node.state.key(), -1, 0, 0, h))
+    winning_path = None
+
+    while beam and winning_path is None:
+        # (h, node id) of every new state one action on from the beam
+        candidates = []
+        for current in beam:
+            state = store.state(current)
+            depth = store.depths[current] + 1
+            for action in stats.successors(state):
+                undo = make(state, action)
+                stats.nodes_generated += 1
+                if not state.black:
+                    winning_path = store.path(current, [action])
+                    break
+                key = state.key()
+                if key in store.ids:
+                    stats.duplicate_hits += 1
+                else:
+                    h = evaluate(state)
+                    if h == heuristics.LOST_GAME:
+                        stats.dead_ends += 1
+                    else:
+                        candidates.append((h, store.add(key, current, action, depth, h)))
+                state.unmake(undo)
+            stats.nodes_expanded += 1
+            if winning_path is not None:
+                break
+        stats.max_frontier = max(stats.max_frontier, len(candidates))
+        beam = [node for h, node in heapq.nsmallest(width, candidates)]
+
+    stats.finish(winning_path)
+    estimator.record(stats.nodes_expanded, stats.solution_length)
+    return winning_path
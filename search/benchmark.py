@@ -0,0 +1,231 @@
+"""
+Benchmark harness: runs solvers over the level test cases, a seeded set of
+solvable random boards from generator.py and, with --corpus, the boards of a
+corpus generator.py wrote (optionally only some of its difficulty buckets). It
+checks every sequence the solvers return by replaying it on the engine,
+and records wall time, nodes expanded and peak RSS for each (board, solver) pair.
+Where an exact solver (see solvers.EXACT_SOLVERS) solved a board, the other
+solvers' answers for it are compared against that shortest length.
+
+--scaling instead runs the parallel solver on every board with each of
+SCALING_WORKERS worker processes, reporting its speedup and efficiency over one
+worker.
+
+Save the numbers as a baseline with --save-baseline, and later runs given
+--baseline flag anything that got slower, expanded more nodes or used more memory
+by more than --threshold, or stopped finding a valid win. For example:
+
+    python search/benchmark.py --save-baseline baseline.json
+    python search/benchmark.py --baseline baseline.json --threshold 0.2
+"""
+
+import argparse
+import glob
+import json
+import os
+import resource
+import sys
+from multiprocessing import Pool
+
+import batch
+import generator
+import heuristics
+import loader
+import replay
+from solvers import SOLVERS, EXACT_SOLVERS
+
+LEVELS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '2020-part-a-test-cases')
+
+# the numbers compared against the baseline, lower is better for all of them
+METRICS = ('time', 'nodes_expanded', 'peak_rss_kb')
+# differences in time below this many seconds are timer noise, not regressions
+MIN_TIME = 0.05
+# the parallel solver starts its own pool of processes, which the benchmark's pool workers can't do, so it's
+# measured by run_scaling instead
+POOL_SOLVERS = [name for name in SOLVERS if name != 'parallel']
+SCALING_WORKERS = (1, 2, 4, 8)
+
+
+def level_cases():
+    """(name, board data) for every test-level-*.json board"""
+    cases = []
+    for path in sorted(glob.glob(os.path.join(LEVELS_DIR, 'test-level-*.json'))):
+        with open(path) as file:
+            cases.append((os.path.splitext(os.path.basename(path))[0], json.load(file)))
+    return cases
+
+
+def random_cases(count, seed=0):
+    """(name, board data) for count solvable random boards, the same ones every time for the same seed"""
+    return [(name, data) for name, data, witness in generator.generate_boards(count, seed)]
+
+
+def run_case(case):
+    """solve one (name, data, solver, heuristic, timeout) case, runs in a fresh worker process so peak RSS is its own"""
+    name, data, solver, heuristic, timeout = case
+    result = batch.solve_board(data, name, solver, heuristic, timeout)
+    if result['status'] == 'solved':
+        result['invalid'] = replay.validate(loader.load_state(data), result['actions'])
+    # generated rather than expanded, so solvers that expand nodes in different ways compare fairly
+    result['nodes_per_second'] = result['stats']['nodes_generated'] / result['time'] if result['time'] else None
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux kilobytes
+    result['peak_rss_kb'] = peak_rss // 1024 if sys.platform == 'darwin' else peak_rss
+    result.pop('actions', None)
+    result.pop('stats', None)
+    return result
+
+
+def run_benchmark(cases, solvers, heuristic=heuristics.DEFAULT_ESTIMATOR, timeout=60, workers=1):
+    """run every solver over every case, returning a result dict for each pair. More than one worker is faster
+    but the timings then compete for the machine"""
+    jobs = [(name, data, solver, heuristic, timeout) for name, data in cases for solver in solvers]
+    with Pool(workers, maxtasksperchild=1) as pool:
+        return pool.map(run_case, jobs, chunksize=1)
+
+
+def compare_to_optimal(results):
+    """give every solved result the length of the shortest win for its board as 'optimal', and how many times
+    longer than that its own answer is as 'excess', where an exact solver with an admissible heuristic solved it"""
+    optimal = {}
+    for result in results:
+        if result['solver'] in EXACT_SOLVERS and heuristics.ESTIMATORS[result['heuristic']].admissible and \
+                result['status'] == 'solved' and not result.get('invalid'):
+            optimal[result['board']] = result['length']
+    for result in results:
+        if result['status'] == 'solved' and result['board'] in optimal:
+            result['optimal'] = optimal[result['board']]
+            result['excess'] = result['length'] / result['optimal'] if result['optimal'] else 1.0
+
+
+def run_scaling(cases, heuristic=heuristics.DEFAULT_ESTIMATOR, timeout=60, worker_counts=SCALING_WORKERS):
+    """solve every case with the parallel solver using each number of workers in turn, in this process. Each
+    result gets the 'workers', and its 'speedup' and 'efficiency' (speedup per worker) over the first count"""
+    results = []
+    for name, data in cases:
+        first = None
+        for workers in worker_counts:
+            result = batch.solve_board(data, name, 'parallel', heuristic, timeout, options={'workers': workers})
+            if result['status'] == 'solved':
+                result['invalid'] = replay.validate(loader.load_state(data), result['actions'])
+            result['workers'] = workers
+            if first is None:
+                first = result
+            if result['status'] == first['status'] == 'solved' and result['time']:
+                result['speedup'] = first['time'] * first['workers'] / result['time']
+                result['efficiency'] = result['speedup'] / result['workers']
+            result.pop('actions', None)
+            result.pop('stats', None)
+            results.append(result)
+    return results
+
+
+def print_scaling(results, out=sys.stdout):
+    out.write("{:<22} {:>7} {:<12} {:>6} {:>9} {:>10} {:>8} {:>10}\n".format(
+        'board', 'workers', 'status', 'length', 'time', 'expanded', 'speedup', 'efficiency'))
+    for result in results:
+        status = 'INVALID' if result.get('invalid') else result['status']
+        length = result.get('length')
+        speedup = result.get('speedup')
+        out.write("{:<22} {:>7} {:<12} {:>6} {:>9.3f} {:>10} {:>8} {:>10}\n".format(
+            result['board'], result['workers'], status, '-' if length is None else length, result['time'],
+            result['nodes_expanded'], '-' if speedup is None else '{:.2f}x'.format(speedup),
+            '-' if speedup is None else '{:.0%}'.format(result['efficiency'])))
+    for result in results:
+        if result.get('invalid'):
+            out.write("{} with {} workers returned an invalid sequence: {}\n".format(
+                result['board'], result['workers'], result['invalid']))
+
+
+def result_key(result):
+    return '{} {}'.format(result['board'], result['solver'])
+
+
+def find_regressions(results, baseline, threshold):
+    """compare results to a baseline from an earlier run, returning a description of each regression"""
+    regressions = []
+    for result in results:
+        old = baseline.get(result_key(result))
+        if old is None:
+            continue
+        if old['status'] == 'solved' and not (result['status'] == 'solved' and not result.get('invalid')):
+            regressions.append("{}: was solved, now {}".format(result_key(result), result.get('invalid') or
+                                                                result['status']))
+            continue
+        for metric in METRICS:
+            if metric == 'time' and result['time'] < MIN_TIME:
+                continue
+            if old.get(metric) and result.get(metric) is not None and result[metric] > old[metric] * (1 + threshold):
+                regressions.append("{}: {} went from {:.4g} to {:.4g} (+{:.0%})".format(
+                    result_key(result), metric, old[metric], result[metric], result[metric] / old[metric] - 1))
+    return regressions
+
+
+def print_results(results, out=sys.stdout):
+    out.write("{:<22} {:<11} {:<12} {:>6} {:>7} {:>9} {:>10} {:>9} {:>9}\n".format(
+        'board', 'solver', 'status', 'length', 'excess', 'time', 'expanded', 'nodes/s', 'rss (KB)'))
+    for result in results:
+        status = 'INVALID' if result.get('invalid') else result['status']
+        length = result.get('length')
+        excess = result.get('excess')
+        out.write("{:<22} {:<11} {:<12} {:>6} {:>7} {:>9.3f} {:>10} {:>9} {:>9}\n".format(
+            result['board'], result['solver'], status, '-' if length is None else length,
+            '-' if excess is None else '{:.2f}x'.format(excess), result['time'], result['nodes_expanded'],
+            '-' if result.get('nodes_per_second') is None else int(result['nodes_per_second']),
+            result['peak_rss_kb']))
+    for result in results:
+        if result.get('invalid'):
+            out.write("{} returned an invalid sequence: {}\n".format(result_key(result), result['invalid']))
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="Benchmark the solvers and check for performance regressions")
+    parser.add_argument('--solvers', nargs='+', default=POOL_SOLVERS, choices=POOL_SOLVERS)
+    parser.add_argument('--heuristic', default=heuristics.DEFAULT_ESTIMATOR, choices=list(heuristics.ESTIMATORS))
+    parser.add_argument('--random', type=int, default=10, help="number of random boards (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0, help="seed for the random boards (default: %(default)s)")
+    parser.add_argument('--corpus', metavar='FILE',
+                        help="also run the boards in a generator.py corpus.jsonl")
+    parser.add_argument('--buckets', nargs='+', choices=[name for name, _ in generator.BUCKETS],
+                        help="only run the corpus boards in these difficulty buckets")
+    parser.add_argument('--timeout', type=float, default=60, help="seconds per board (default: %(default)s)")
+    parser.add_argument('--workers', type=int, default=1, help="boards to run at once (default: %(default)s)")
+    parser.add_argument('--scaling', action='store_true',
+                        help="report how the parallel solver scales over {} workers instead".format(
+                            '/'.join(map(str, SCALING_WORKERS))))
+    parser.add_argument('--save-baseline', metavar='FILE', help="write the results to FILE as the new baseline")
+    parser.add_argument('--baseline', metavar='FILE', help="compare the results against the baseline in FILE")
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="fraction a metric can grow by before it's a regression (default: %(default)s)")
+    return parser.parse_args(argv)
+
+
+def main():
+    args = parse_args(sys.argv[1:])
+    cases = level_cases() + random_cases(args.random, args.seed)
+    if args.corpus:
+        cases += generator.read_corpus(args.corpus, args.buckets)
+    if args.scaling:
+        results = run_scaling(cases, args.heuristic, args.timeout)
+        print_scaling(results)
+        sys.exit(1 if any(result.get('invalid') for result in results) else 0)
+    results = run_benchmark(cases, args.solvers, args.heuristic, args.timeout, args.workers)
+    compare_to_optimal(results)
+    print_results(results)
+
+    failed = any(result.get('invalid') for result in results)
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = find_regressions(results, json.load(file), args.threshold)
+        for regression in regressions:
+            print("REGRESSION " + regression)
+        print("{} regressions against {}".format(len(regressions), args.baseline))
+        failed = failed or bool(regressions)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump({result_key(result): result for result in results}, file, indent=4)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
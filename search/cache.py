@@ -0,0 +1,132 @@
+"""
+Persistent cache of solved positions, kept in an SQLite file so it outlives the
+process and can be shared by every run (and every batch worker) pointed at it.
+
+Positions are stored under their canonical key (see symmetry.py), so a board
+that is a rotation or reflection of one solved before is a hit too; the actions
+are stored on the canonical board and turned back round on the way out. Each
+entry is the sequence that wins from the position (or a note that there is no
+win), and whether it's exact, i.e. known to be a shortest win. The suffixes of a
+shortest win are shortest wins themselves, so an exact solution also gives the
+exact distance to win of every position along it, and store can record those
+too for searches to stop at (see ai.get_winning_sequence).
+
+The file holds at most max_entries positions, the least recently used ones go
+first when it's full.
+"""
+
+import json
+import sqlite3
+
+import symmetry
+from engine import KEY_BYTES, encode_action
+
+DEFAULT_MAX_ENTRIES = 100000
+# seconds to wait for another process to finish writing before giving up
+LOCK_TIMEOUT = 30
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS positions (
+    key BLOB PRIMARY KEY,
+    -- JSON list of the encoded actions on the canonical board, NULL if there is no win from here
+    actions TEXT,
+    distance INTEGER,
+    exact INTEGER NOT NULL,
+    used INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS positions_used ON positions (used);
+"""
+
+
+class SolutionCache:
+    """An open cache file, see the module docstring. Use it as a context manager or call close()"""
+
+    def __init__(self, path, max_entries=DEFAULT_MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self.connection = sqlite3.connect(path, timeout=LOCK_TIMEOUT)
+        self.connection.executescript(SCHEMA)
+        # ticks up on every hit and store, entries with the smallest used are the least recently used
+        self.clock = self.connection.execute("SELECT COALESCE(MAX(used), 0) FROM positions").fetchone()[0]
+        self.hits = 0
+        self.misses = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM positions").fetchone()[0]
+
+    def close(self):
+        self.connection.commit()
+        self.connection.close()
+
+    def tick(self):
+        self.clock += 1
+        return self.clock
+
+    def lookup(self, state, exact=False):
+        """None if state isn't in the cache (or, with exact, only a possibly longer win is), otherwise
+        (actions, exact) where actions is the list of encoded actions that wins from state, or None if there's
+        no win from it at all"""
+        key, sym = symmetry.canonical_key(state)
+        row = self.connection.execute("SELECT actions, exact FROM positions WHERE key = ?",
+                                      (key.to_bytes(KEY_BYTES, 'little'),)).fetchone()
+        if row is None or (exact and not row[1]):
+            self.misses += 1
+            return None
+        self.hits += 1
+        # committed straight away, an open write transaction would lock every other process out of the file
+        with self.connection:
+            self.connection.execute("UPDATE positions SET used = ? WHERE key = ?",
+                                    (self.tick(), key.to_bytes(KEY_BYTES, 'little')))
+        if row[0] is None:
+            return None, bool(row[1])
+        to_real = symmetry.INVERSES[sym]
+        return [symmetry.transform_action(action, to_real) for action in json.loads(row[0])], bool(row[1])
+
+    def distance(self, state):
+        """the exact number of actions a shortest win from state takes if the cache knows it, otherwise None"""
+        entry = self.lookup(state, exact=True)
+        return None if entry is None or entry[0] is None else len(entry[0])
+
+    def store(self, state, actions, exact=False, positions=False):
+        """record that actions (encoded or decode_action tuples, None for no win) wins from state. exact says
+        it's a shortest win; then with positions every position along the way is stored with its distance too.
+        An entry already there is only replaced by a better one: exact over not, then a win over none, then shorter
+        over longer"""
+        rows = []
+        if actions is None:
+            rows.append(self._row(state, None, exact))
+        else:
+            actions = [action if isinstance(action, int) else encode_action(action) for action in actions]
+            state = state.copy()
+            for i in range(len(actions) if exact and positions else 1):
+                rows.append(self._row(state, actions[i:], exact))
+                state.make(actions[i])
+        with self.connection:
+            self.connection.executemany(
+                "INSERT INTO positions (key, actions, distance, exact, used) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (key) DO UPDATE SET actions = excluded.actions, distance = excluded.distance, "
+                "exact = excluded.exact, used = excluded.used "
+                "WHERE excluded.exact > positions.exact OR (excluded.exact = positions.exact AND "
+                "(positions.distance IS NULL OR excluded.distance < positions.distance))", rows)
+            self.evict()
+
+    def _row(self, state, actions, exact):
+        key, sym = symmetry.canonical_key(state)
+        if actions is None:
+            return key.to_bytes(KEY_BYTES, 'little'), None, None, int(exact), self.tick()
+        return key.to_bytes(KEY_BYTES, 'little'), json.dumps([symmetry.transform_action(action, sym)
+                                                              for action in actions]), \
+            len(actions), int(exact), self.tick()
+
+    def evict(self):
+        """drop the least recently used entries until there are no more than max_entries"""
+        excess = len(self) - self.max_entries
+        if excess > 0:
+            self.connection.execute("DELETE FROM positions WHERE key IN "
+                                    "(SELECT key FROM positions ORDER BY used LIMIT ?)", (excess,))
@@ -0,0 +1,306 @@
+"""
+Compact bitboard engine for the search.
+
+Squares are numbered 0..63 with square = x + 8 * y, so a set of squares is an int
+with bit `square` set. A State holds one occupancy mask per colour plus an array of
+stack heights packed 4 bits per square into one int, and everything the search asks about the board (where can
+this stack move to, which squares does a boom hit) is a precomputed table lookup.
+"""
+
+from functools import lru_cache
+
+BOARD_SIZE = 8
+N_SQUARES = BOARD_SIZE * BOARD_SIZE
+
+LEFT = (-1, 0)
+RIGHT = (1, 0)
+UP = (0, 1)
+DOWN = (0, -1)
+MOVE_DIRECTIONS = [LEFT, RIGHT, UP, DOWN]
+
+# stack heights are packed HEIGHT_BITS bits per square, so no stack can be taller than MAX_HEIGHT
+HEIGHT_BITS = 4
+MAX_HEIGHT = (1 << HEIGHT_BITS) - 1
+
+MOVE = 'MOVE'
+BOOM = 'BOOM'
+
+
+def square_index(x, y):
+    """the square number of the coordinates (x, y)"""
+    return x + y * BOARD_SIZE
+
+
+def on_board(x, y):
+    return 0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE
+
+
+# (x, y) coordinates of every square, e.g. SQUARE_COORDS[10] == (2, 1)
+SQUARE_COORDS = [(square % BOARD_SIZE, square // BOARD_SIZE) for square in range(N_SQUARES)]
+
+# single bit mask of every square
+SQUARE_BITS = [1 << square for square in range(N_SQUARES)]
+BOARD_MASK = (1 << N_SQUARES) - 1
+
+
+def _make_neighbour_mask(square):
+    x, y = SQUARE_COORDS[square]
+    mask = 0
+    for dx in (-1, 0, 1):
+        for dy in (-1, 0, 1):
+            if (dx, dy) != (0, 0) and on_board(x + dx, y + dy):
+                mask |= SQUARE_BITS[square_index(x + dx, y + dy)]
+    return mask
+
+
+def _make_ray(square, direction):
+    x, y = SQUARE_COORDS[square]
+    ray = []
+    for n_steps in range(1, BOARD_SIZE):
+        dest_x, dest_y = x + n_steps * direction[0], y + n_steps * direction[1]
+        if not on_board(dest_x, dest_y):
+            break
+        ray.append(square_index(dest_x, dest_y))
+    return ray
+
+
+# the (up to) 8 squares surrounding each square
+NEIGHBOUR_MASKS = [_make_neighbour_mask(square) for square in range(N_SQUARES)]
+
+# the 3x3 blast radius of a boom on each square, the square itself included
+BLAST_MASKS = [NEIGHBOUR_MASKS[square] | SQUARE_BITS[square] for square in range(N_SQUARES)]
+
+# RAYS[square][d][n_steps - 1] is the square reached by moving n_steps in MOVE_DIRECTIONS[d],
+# each ray stops at the edge of the board so a ray's length is the furthest we can move that way
+RAYS = [[_make_ray(square, direction) for direction in MOVE_DIRECTIONS] for square in range(N_SQUARES)]
+
+
+def _steps_between(from_square, to_square):
+    for ray in RAYS[from_square]:
+        if to_square in ray:
+            return ray.index(to_square) + 1
+    return 0
+
+
+# STEPS[a][b] is how many steps it takes to move from square a to square b in a straight line, 0 if you can't
+STEPS = [[_steps_between(a, b) for b in range(N_SQUARES)] for a in range(N_SQUARES)]
+
+
+def iter_squares(mask):
+    """yield the square number of every set bit in mask, lowest first"""
+    while mask:
+        low_bit = mask & -mask
+        yield low_bit.bit_length() - 1
+        mask ^= low_bit
+
+
+def dest_square(square, direction, n_steps):
+    """the square n_steps away from square in MOVE_DIRECTIONS[direction], or None if that is off the board"""
+    ray = RAYS[square][direction]
+    if n_steps <= len(ray):
+        return ray[n_steps - 1]
+    return None
+
+
+def encode_move(n_pieces, from_square, to_square):
+    """pack a MOVE action into an int: n_pieces in bits 12 and up, to_square in bits 6-11 and from_square in bits 0-5"""
+    return (n_pieces << 12) | (to_square << 6) | from_square
+
+
+def encode_boom(square):
+    """pack a BOOM action into an int, it's a move of 0 pieces so it's just the square"""
+    return square
+
+
+def decode_action(action):
+    """unpack an int action into the tuples the printing code expects,
+    (MOVE, n_pieces, (x_a, y_a), (x_b, y_b)) or ((x, y), BOOM)"""
+    n_pieces = action >> 12
+    from_square = action & 0x3f
+    if n_pieces == 0:
+        return SQUARE_COORDS[from_square], BOOM
+    return MOVE, n_pieces, SQUARE_COORDS[from_square], SQUARE_COORDS[(action >> 6) & 0x3f]
+
+
+def encode_action(action):
+    """pack an action tuple, as returned by decode_action, back into an int"""
+    if action[1] == BOOM:
+        if not on_board(*action[0]):
+            raise IllegalAction("{} is off the board".format(action))
+        return encode_boom(square_index(*action[0]))
+    _, n_pieces, (x_a, y_a), (x_b, y_b) = action
+    if not (on_board(x_a, y_a) and on_board(x_b, y_b)):
+        raise IllegalAction("{} goes off the board".format(action))
+    return encode_move(n_pieces, square_index(x_a, y_a), square_index(x_b, y_b))
+
+
+# boom results are cached for each (occupancy, square) pair, sized to comfortably hold a full search's worth
+BOOM_CACHE_SIZE = 1 << 16
+
+
+@lru_cache(maxsize=BOOM_CACHE_SIZE)
+def boom_mask(occupied, square):
+    """mask of every stack removed by a boom on square, given the occupied squares of both colours"""
+    removed = SQUARE_BITS[square]
+    # worklist of squares that have exploded but whose blast we haven't resolved yet
+    to_explode = removed
+    while to_explode:
+        low_bit = to_explode & -to_explode
+        to_explode ^= low_bit
+        # stacks in the blast radius that haven't gone off yet explode in turn
+        hit = BLAST_MASKS[low_bit.bit_length() - 1] & occupied & ~removed
+        removed |= hit
+        to_explode |= hit
+    return removed
+
+
+# bytes in a packed State.key(): the two square masks and then the heights, see State.key
+KEY_BYTES = (2 * N_SQUARES + N_SQUARES * HEIGHT_BITS) // 8
+
+
+class State:
+    """Board position: occupancy bitmasks for each colour and the height of the stack on each square"""
+    __slots__ = ('white', 'black', 'heights')
+
+    def __init__(self, white=0, black=0, heights=0):
+        self.white = white
+        self.black = black
+        # packed array, bits 4 * square to 4 * square + 3 are the number of pieces stacked on square (0 if empty)
+        self.heights = heights
+
+    @classmethod
+    def from_key(cls, key):
+        """rebuild a state from its key()"""
+        return cls(key & BOARD_MASK, (key >> N_SQUARES) & BOARD_MASK, key >> (2 * N_SQUARES))
+
+    def __eq__(self, other):
+        return self.white == other.white and self.black == other.black and self.heights == other.heights
+
+    def __hash__(self):
+        return hash(self.key())
+
+    def key(self):
+        """canonical, hashable key for this state, the masks and heights packed into a single int"""
+        return self.white | (self.black << N_SQUARES) | (self.heights << (2 * N_SQUARES))
+
+    def height(self, square):
+        """number of pieces on square, 0 if it's empty"""
+        return (self.heights >> (square * HEIGHT_BITS)) & MAX_HEIGHT
+
+    @property
+    def white_stacks(self):
+        return {SQUARE_COORDS[square]: self.height(square) for square in iter_squares(self.white)}
+
+    @property
+    def black_stacks(self):
+        return {SQUARE_COORDS[square]: self.height(square) for square in iter_squares(self.black)}
+
+    def total_white(self):
+        return sum(self.height(square) for square in iter_squares(self.white))
+
+    def total_black(self):
+        return sum(self.height(square) for square in iter_squares(self.black))
+
+    def copy(self):
+        return State(self.white, self.black, self.heights)
+
+    def move(self, n_pieces, from_square, to_square):
+        """the state after moving n_pieces of the white stack on from_square onto to_square"""
+        child = self.copy()
+        child.make(encode_move(n_pieces, from_square, to_square))
+        return child
+
+    def boom(self, square):
+        """the state after the stack on square explodes, along with everything its chain reaction reaches"""
+        child = self.copy()
+        child.make(encode_boom(square))
+        return child
+
+    def remove(self, mask):
+        """the state after removing every stack on the squares in mask"""
+        child = self.copy()
+        child._remove(mask)
+        return child
+
+    def make(self, action):
+        """apply an encoded action to this state in place, returns the undo information to pass to unmake()"""
+        undo = (self.white, self.black, self.heights)
+        n_pieces = action >> 12
+        from_square = action & 0x3f
+        if n_pieces == 0:
+            self._remove(boom_mask(self.white | self.black, from_square))
+            return undo
+        to_square = (action >> 6) & 0x3f
+        self.heights += (n_pieces << (to_square * HEIGHT_BITS)) - (n_pieces << (from_square * HEIGHT_BITS))
+        self.white |= SQUARE_BITS[to_square]
+        if not (self.heights >> (from_square * HEIGHT_BITS)) & MAX_HEIGHT:
+            self.white &= ~SQUARE_BITS[from_square]
+        return undo
+
+    def unmake(self, undo):
+        """take back the action make() returned undo for"""
+        self.white, self.black, self.heights = undo
+
+    def _remove(self, mask):
+        for square in iter_squares(mask & (self.white | self.black)):
+            self.heights &= ~(MAX_HEIGHT << (square * HEIGHT_BITS))
+        self.white &= ~mask
+        self.black &= ~mask
+
+
+def successors(state):
+    """lazily yield every legal action from state as an encoded int, the BOOMs first and then the MOVEs.
+    The caller can make() each action on state as long as it unmake()s it before asking for the next one"""
+    white, black = state.white, state.black
+    for square in iter_squares(white):
+        yield encode_boom(square)
+    for square in iter_squares(white):
+        height = state.height(square)
+        # the squares we could land on going each way are worked out once, not once for every n_pieces
+        for ray in RAYS[square]:
+            # number of squares to move, 1 <= n_steps <= height; the ray already stops at the edge of the board
+            for dest in ray[:height]:
+                # can't land on an enemy piece, but we can jump over one to squares further along
+                if black & SQUARE_BITS[dest]:
+                    continue
+                for n_pieces in range(1, height + 1):
+                    yield encode_move(n_pieces, square, dest)
+
+
+class IllegalAction(ValueError):
+    pass
+
+
+def check_action(state, action):
+    """raise IllegalAction if the encoded action can't be played in state"""
+    n_pieces = action >> 12
+    from_square = action & 0x3f
+    if not state.white & SQUARE_BITS[from_square]:
+        raise IllegalAction("no white stack at {}".format(SQUARE_COORDS[from_square]))
+    if n_pieces == 0:
+        return
+    to_square = (action >> 6) & 0x3f
+    height = state.height(from_square)
+    if n_pieces > height:
+        raise IllegalAction("can't move {} pieces from a stack of {} at {}".format(
+            n_pieces, height, SQUARE_COORDS[from_square]))
+    if not 0 < STEPS[from_square][to_square] <= height:
+        raise IllegalAction("a stack of {} can't move from {} to {}".format(
+            height, SQUARE_COORDS[from_square], SQUARE_COORDS[to_square]))
+    if state.black & SQUARE_BITS[to_square]:
+        raise IllegalAction("can't land on the black stack at {}".format(SQUARE_COORDS[to_square]))
+
+
+def replay(state, actions):
+    """play a sequence of actions (encoded ints or decode_action tuples) from state, checking each one is legal.
+    Returns the final state, state itself is left alone. Raises IllegalAction, saying which action was illegal"""
+    state = state.copy()
+    for i, action in enumerate(actions):
+        try:
+            if not isinstance(action, int):
+                action = encode_action(action)
+            check_action(state, action)
+        except IllegalAction as error:
+            raise IllegalAction("action {}: {}".format(i + 1, error))
+        state.make(action)
+    return state
@@ -0,0 +1,222 @@
+"""
+Random puzzle generator: seeded boards in the board JSON schema, with control over
+how many stacks each colour has, how tall they are and how tightly the black
+stacks cluster together.
+
+Every board it keeps is solvable. A board is only accepted once a witness win has
+been found for it: first the black stacks' boom closures (engine.boom_mask, via
+goal.detonation_squares) have to be coverable by single booms at all, and then a
+depth-first search over goal's route-then-boom steps has to find a plan that
+clears every black stack. The witness isn't a shortest win, just a proof one exists.
+
+A corpus is a number of such boards, each graded by how many nodes A* with the
+default heuristic expands solving it (up to a node limit) and put in the first
+difficulty bucket of BUCKETS that holds that many, so performance work can pick
+out the boards the solver struggles with. The same seed always gives the same
+corpus. write_corpus lays it out as
+
+    DIR/corpus.jsonl              every board, one per line with its name, bucket and nodes expanded
+    DIR/BUCKET/NAME.json          each board on its own
+    DIR/BUCKET/NAME-out.txt       its witness win, which replay.py can check
+
+and corpus.jsonl can be given straight to __main__'s batch mode or benchmark.py. For example:
+
+    python search/generator.py corpus --count 200 --seed 1 --black 4 10 --clustering 0.6
+"""
+
+import argparse
+import json
+import os
+import random
+
+import ai
+import goal
+import heuristics
+import loader
+import print_utils
+from engine import BOARD_SIZE, MAX_HEIGHT, N_SQUARES, SQUARE_COORDS, NEIGHBOUR_MASKS, iter_squares
+from stats import SearchStats
+
+# (name, most nodes expanded) for each difficulty bucket, easiest first; None takes everything harder
+BUCKETS = (('easy', 100), ('medium', 1000), ('hard', 10000), ('extreme', None))
+# A* expansions spent grading a board, boards that use them all up go in the last bucket
+DEFAULT_NODE_LIMIT = 50000
+# route-then-boom steps the witness search may try before it gives up on a board
+CERTIFY_BUDGET = 500
+# boards to draw before giving up on finding a solvable one with the settings asked for
+MAX_TRIES = 1000
+
+
+def random_board(rng, n_white, n_black, max_height=2, clustering=0.0):
+    """board data with n_white white stacks and n_black black stacks of 1 to max_height pieces on distinct squares.
+    Each black stack after the first goes next to one placed before it with probability clustering, and on any
+    empty square otherwise. The board isn't checked for solvability, see generate_board"""
+    free = set(range(N_SQUARES))
+    black = []
+    for _ in range(n_black):
+        near = []
+        if black and rng.random() < clustering:
+            near = sorted(square for placed in black for square in iter_squares(NEIGHBOUR_MASKS[placed])
+                          if square in free)
+        square = rng.choice(near or sorted(free))
+        free.discard(square)
+        black.append(square)
+    white = rng.sample(sorted(free), n_white)
+    return {
+        'white': [[rng.randint(1, max_height)] + list(SQUARE_COORDS[square]) for square in white],
+        'black': [[rng.randint(1, max_height)] + list(SQUARE_COORDS[square]) for square in black],
+    }
+
+
+def certify(state, budget=CERTIFY_BUDGET):
+    """a witness win from state as encoded actions, or None if none turned up within budget route-then-boom steps
+    (the board may still be solvable, but it can't be vouched for)"""
+    if not state.black:
+        return []
+    if not state.white or not goal.clearing_sets(state, limit=1):
+        return None
+    seen = {state.key()}
+    stack = [(state, [])]
+    while stack and budget > 0:
+        state, actions = stack.pop()
+        budget -= 1
+        # the steps that leave the fewest black stacks are tried first, so they go on the stack last
+        steps = sorted(goal.plan_steps(state), key=lambda step: -bin(step[1].black).count('1'))
+        for step_actions, child in steps:
+            if not child.black:
+                return actions + step_actions
+            key = child.key()
+            if key not in seen and child.white:
+                seen.add(key)
+                stack.append((child, actions + step_actions))
+    return None
+
+
+def generate_board(rng, white=(1, 3), black=(3, 8), max_height=2, clustering=0.0, max_tries=MAX_TRIES):
+    """(board data, witness actions) for a solvable random board with between white[0] and white[1] white stacks
+    and black[0] to black[1] black stacks, see random_board. Raises ValueError if max_tries boards in a row
+    couldn't be certified"""
+    for _ in range(max_tries):
+        data = random_board(rng, rng.randint(*white), rng.randint(*black), max_height, clustering)
+        witness = certify(loader.load_state(data))
+        if witness is not None:
+            return data, witness
+    raise ValueError("no solvable board in {} tries, try more white stacks, taller ones or fewer black stacks"
+                     .format(max_tries))
+
+
+def generate_boards(count, seed=0, **options):
+    """(name, board data, witness actions) for count solvable boards, the same ones every time for the same seed
+    and options (see generate_board)"""
+    rng = random.Random(seed)
+    boards = []
+    for i in range(count):
+        data, witness = generate_board(rng, **options)
+        boards.append(('random-{}-{}'.format(seed, i), data, witness))
+    return boards
+
+
+def bucket_for(nodes_expanded):
+    for name, most in BUCKETS:
+        if most is None or nodes_expanded <= most:
+            return name
+
+
+def grade(data, heuristic=heuristics.DEFAULT_ESTIMATOR, node_limit=DEFAULT_NODE_LIMIT):
+    """A* the board in data for up to node_limit expansions, returning (status, nodes expanded, length of the win
+    or None)"""
+    stats = SearchStats()
+    search = ai.AStarSearch(loader.load_state(data), heuristics.get_estimator(heuristic), stats)
+    status = search.run(node_limit=node_limit)
+    return status, stats.nodes_expanded, len(search.winning_path) if status == ai.SOLVED else None
+
+
+def build_corpus(count, seed=0, heuristic=heuristics.DEFAULT_ESTIMATOR, node_limit=DEFAULT_NODE_LIMIT, **options):
+    """count generated boards (see generate_boards), each graded into a bucket. Returns a list of dicts with the
+    board's name, data, witness, bucket, status, nodes_expanded and length (of the shortest win, if A* found it)"""
+    corpus = []
+    for name, data, witness in generate_boards(count, seed, **options):
+        status, nodes_expanded, length = grade(data, heuristic, node_limit)
+        corpus.append({
+            'name': name,
+            'data': data,
+            'witness': witness,
+            'bucket': bucket_for(nodes_expanded) if status == ai.SOLVED else BUCKETS[-1][0],
+            'status': status,
+            'nodes_expanded': nodes_expanded,
+            'length': length,
+        })
+    return corpus
+
+
+def write_corpus(directory, corpus):
+    """write the corpus out as described in the module docstring"""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, 'corpus.jsonl'), 'w') as index:
+        for entry in corpus:
+            bucket_dir = os.path.join(directory, entry['bucket'])
+            os.makedirs(bucket_dir, exist_ok=True)
+            with open(os.path.join(bucket_dir, entry['name'] + '.json'), 'w') as file:
+                json.dump(entry['data'], file)
+            with open(os.path.join(bucket_dir, entry['name'] + '-out.txt'), 'w') as file:
+                print_utils.print_sequence(entry['witness'], file)
+            line = {'name': entry['name'], 'bucket': entry['bucket'], 'nodes_expanded': entry['nodes_expanded'],
+                    'length': entry['length']}
+            line.update(entry['data'])
+            index.write(json.dumps(line) + '\n')
+
+
+def read_corpus(path, buckets=None):
+    """(name, board data) for every board in a corpus.jsonl, or only those in buckets if given"""
+    cases = []
+    with open(path) as file:
+        for name, line in loader.iter_lines(file, path):
+            name, data = loader.parse_line(line, name)
+            if buckets is None or data.get('bucket') in buckets:
+                cases.append((name, data))
+    return cases
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a seeded corpus of solvable boards graded by difficulty")
+    parser.add_argument('directory', help="where to write the corpus")
+    parser.add_argument('--count', type=int, default=100, help="number of boards (default: %(default)s)")
+    parser.add_argument('--seed', type=int, default=0, help="random seed (default: %(default)s)")
+    parser.add_argument('--white', type=int, nargs=2, default=(1, 3), metavar=('MIN', 'MAX'),
+                        help="number of white stacks (default: 1 3)")
+    parser.add_argument('--black', type=int, nargs=2, default=(3, 8), metavar=('MIN', 'MAX'),
+                        help="number of black stacks (default: 3 8)")
+    parser.add_argument('--max-height', type=int, default=2, help="tallest stack (default: %(default)s)")
+    parser.add_argument('--clustering', type=float, default=0.0,
+                        help="chance each black stack goes next to another one, 0 to 1 (default: %(default)s)")
+    parser.add_argument('--heuristic', default=heuristics.DEFAULT_ESTIMATOR, choices=list(heuristics.ESTIMATORS),
+                        help="heuristic the boards are graded with (default: %(default)s)")
+    parser.add_argument('--node-limit', type=int, default=DEFAULT_NODE_LIMIT,
+                        help="most A* expansions spent grading a board (default: %(default)s)")
+    args = parser.parse_args(argv)
+    if args.white[0] < 1 or args.black[0] < 1 or args.white[0] > args.white[1] or args.black[0] > args.black[1]:
+        parser.error("stack counts have to be at least 1, MIN no more than MAX")
+    if args.white[1] + args.black[1] > BOARD_SIZE * BOARD_SIZE:
+        parser.error("more stacks than squares")
+    if not 1 <= args.max_height <= MAX_HEIGHT:
+        parser.error("--max-height has to be between 1 and {}".format(MAX_HEIGHT))
+    if args.white[1] * args.max_height > MAX_HEIGHT:
+        parser.error("white could have {} pieces, at most {} fit on one stack".format(
+            args.white[1] * args.max_height, MAX_HEIGHT))
+    if not 0 <= args.clustering <= 1:
+        parser.error("--clustering has to be between 0 and 1")
+    return args
+
+
+def main():
+    args = parse_args()
+    corpus = build_corpus(args.count, args.seed, args.heuristic, args.node_limit, white=tuple(args.white),
+                          black=tuple(args.black), max_height=args.max_height, clustering=args.clustering)
+    write_corpus(args.directory, corpus)
+    for name, _ in BUCKETS:
+        entries = [entry for entry in corpus if entry['bucket'] == name]
+        print("{:<8} {:>5} boards".format(name, len(entries)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""
+Goal-directed solver for boom-clearing plans.
+
+Every win ends with booms whose chain reactions reach every black stack. Rather than
+searching blindly over single moves, this works out where a white stack would have
+to detonate to take out each part of the black position (its detonation squares,
+grouped by which black stacks the chain reaction from there would clear), and then
+searches over plans made of "route a group of white pieces to a detonation square,
+then boom it". Each route is a small shortest-path problem on the board. The
+fewest-move routes across an empty board are worked out once (see free_routes) and
+used whenever nothing is in their way; only blocked ones fall back to a breadth-first
+search that accounts for how far a stack of a given height can move. The plan
+search only branches over a handful of targets per white stack.
+
+Plans only ever move pieces straight to a detonation square, so the sequence is
+always a valid win but isn't guaranteed to be the shortest one. Some boards can't
+be won that way, e.g. when every white stack starts inside the blast of the first
+boom it would have to make; for those the solver falls back to ai's A* search, so
+it still finds a win whenever there is one.
+"""
+
+import heapq
+from collections import deque
+from functools import lru_cache
+
+import heuristics
+from engine import BOARD_SIZE, RAYS, SQUARE_BITS, SQUARE_COORDS, NEIGHBOUR_MASKS, boom_mask, iter_squares, \
+    square_index, encode_move, encode_boom, decode_action
+from stats import SearchStats
+
+
+def detonation_squares(state):
+    """map each set of black stacks (as a mask) that a single boom could clear to the empty squares or white stacks
+    a white stack would have to boom from to clear exactly that set"""
+    occupied = state.white | state.black
+    candidates = 0
+    for square in iter_squares(state.black):
+        candidates |= NEIGHBOUR_MASKS[square]
+    candidates &= ~state.black
+    covers = {}
+    for square in iter_squares(candidates):
+        cleared = boom_mask(occupied | SQUARE_BITS[square], square) & state.black
+        covers.setdefault(cleared, []).append(square)
+    return covers
+
+
+def clearing_sets(state, limit=8):
+    """up to limit smallest collections of black masks from detonation_squares that between them clear every black
+    stack, smallest first. Empty if no collection of single booms can (so the board can't be won)"""
+    covers = sorted(detonation_squares(state), key=lambda mask: -bin(mask).count('1'))
+    found = []
+    # breadth-first over how many booms we use, so smaller collections come first
+    layer = [((), 0)]
+    while layer and len(found) < limit:
+        next_layer = []
+        for chosen, cleared in layer:
+            start = covers.index(chosen[-1]) + 1 if chosen else 0
+            for mask in covers[start:]:
+                if not mask & ~cleared:
+                    continue
+                if (cleared | mask) == state.black:
+                    found.append(chosen + (mask,))
+                    if len(found) >= limit:
+                        return found
+                else:
+                    next_layer.append((chosen + (mask,), cleared | mask))
+        layer = next_layer
+    return found
+
+
+def route_distances(state, from_square, n_pieces):
+    """breadth-first search for moving n_pieces off the white stack on from_square, only landing on empty squares.
+    The first hop can go as far as the whole stack's height, after that the group can only go n_pieces far.
+    Returns {square: (n_moves, previous square)} for every square the group can reach"""
+    empty = ~(state.white | state.black)
+    reached = {from_square: (0, None)}
+    queue = deque([from_square])
+    while queue:
+        square = queue.popleft()
+        n_moves = reached[square][0]
+        reach = state.height(square) if square == from_square else n_pieces
+        for ray in RAYS[square]:
+            for dest in ray[:reach]:
+                if empty & SQUARE_BITS[dest] and dest not in reached:
+                    reached[dest] = (n_moves + 1, square)
+                    queue.append(dest)
+    return reached
+
+
+def route_squares(reached, to_square):
+    """the squares the group lands on along the route route_distances found to to_square"""
+    landings = []
+    square = to_square
+    while reached[square][1] is not None:
+        landings.append(square)
+        square = reached[square][1]
+    return list(reversed(landings))
+
+
+@lru_cache(maxsize=None)
+def free_routes(from_square, to_square, first_reach, reach):
+    """the fewest-move routes from from_square to to_square on an empty board, for a group whose first hop can go
+    first_reach squares and every hop after that reach squares (reach <= first_reach), as (landing squares, mask of
+    them) pairs. These are the routes that go the whole way along one axis and then the other, taking the longest
+    hops they can; with no stack in the way one of them is a shortest route. Depends only on the squares and reaches,
+    so it's worked out once per combination and shared by every state"""
+    (x_a, y_a), to = SQUARE_COORDS[from_square], SQUARE_COORDS[to_square]
+    routes = []
+    for axes in ((0, 1), (1, 0)):
+        at = [x_a, y_a]
+        landings = []
+        hop_reach = first_reach
+        for axis in axes:
+            while at[axis] != to[axis]:
+                at[axis] += max(-hop_reach, min(hop_reach, to[axis] - at[axis]))
+                landings.append(square_index(*at))
+                hop_reach = reach
+        routes.append(tuple(landings))
+    fewest = min(len(landings) for landings in routes)
+    return tuple((landings, sum(SQUARE_BITS[square] for square in landings))
+                 for landings in sorted(set(routes)) if len(landings) == fewest)
+
+
+def hop_actions(from_square, landings, n_pieces):
+    """the encoded moves that take n_pieces from from_square through each of landings in turn"""
+    actions = []
+    for square in landings:
+        actions.append(encode_move(n_pieces, from_square, square))
+        from_square = square
+    return actions
+
+
+def plan_steps(state):
+    """every (actions, resulting state) macro step from state: route a group of white pieces to a detonation square
+    (or use a white stack already on one) and boom it. Only the closest target for each group and each set of black
+    stacks cleared is kept, further ones can't do any better. Routes come from free_routes where one is clear, and
+    route_distances' breadth-first search only runs for a group when a blocked target could still be the closest"""
+    covers = detonation_squares(state)
+    occupied = state.white | state.black
+    steps = []
+    for square in iter_squares(state.white):
+        height = state.height(square)
+        first_reach = min(height, BOARD_SIZE - 1)
+        for n_pieces in range(1, height + 1):
+            reached = None
+            for targets in covers.values():
+                best = best_target = None
+                # (fewest moves across an empty board, target) for the targets every straight route to is blocked
+                blocked = []
+                for target in targets:
+                    # booming a white stack where it stands only makes sense once, with the whole stack
+                    if target == square and n_pieces != height:
+                        continue
+                    routes = free_routes(square, target, first_reach, n_pieces)
+                    landings = next((landings for landings, mask in routes if not mask & occupied), None)
+                    if landings is None:
+                        blocked.append((len(routes[0][0]), target))
+                    elif best is None or len(landings) < len(best):
+                        best, best_target = landings, target
+                for fewest, target in blocked:
+                    # no route is shorter than the ones across an empty board, so only search round the stacks in
+                    # the way if that could still beat the best clear route
+                    if best is not None and fewest >= len(best):
+                        continue
+                    if reached is None:
+                        reached = route_distances(state, square, n_pieces)
+                    if target in reached and (best is None or reached[target][0] < len(best)):
+                        best, best_target = route_squares(reached, target), target
+                if best is None:
+                    continue
+                actions = hop_actions(square, best, n_pieces) + [encode_boom(best_target)]
+                child = state.copy()
+                # the hops only ever land on empty squares, so the group ends up where one move straight to the
+                # target would leave it
+                if best:
+                    child.make(encode_move(n_pieces, square, best_target))
+                child.make(actions[-1])
+                steps.append((actions, child))
+    return steps
+
+
+def get_winning_sequence(start_node, estimator=None, stats=None):
+    """search over plans of route-then-boom steps for a win, cheapest (in actions) plan first, falling back to
+    ai.get_winning_sequence if none wins. Returns moves in the same form as it does"""
+    import ai
+
+    estimator = estimator or ai.heuristic
+    stats = stats if stats is not None else SearchStats()
+    stats.start()
+    start = start_node.state.copy()
+    if start.black and not clearing_sets(start, limit=1):
+        stats.finish(None)
+        estimator.record(0, None)
+        return None
+    start_key = start.key()
+    # state key -> (cost in actions, parent key, the actions from the parent)
+    best = {start_key: (0, None, [])}
+    explored = set()
+    h = estimator(start)
+    # entries are (f, h, tie breaker, cost, key, state), the tie breaker keeps States from being compared
+    frontier = [(h, h, 0, 0, start_key, start)]
+    pushed = 1
+    winning_key = None
+
+    while frontier and winning_key is None:
+        f, h, _, cost, key, state = heapq.heappop(frontier)
+        if key in explored or cost != best[key][0]:
+            continue
+        if not state.black:
+            winning_key = key
+            break
+        explored.add(key)
+        stats.nodes_expanded += 1
+        for actions, child in plan_steps(state):
+            stats.nodes_generated += 1
+            child_key = child.key()
+            child_cost = cost + len(actions)
+            if child_key in explored or (child_key in best and best[child_key][0] <= child_cost):
+                stats.duplicate_hits += 1
+                continue
+            child_h = estimator(child)
+            if child_h == heuristics.LOST_GAME:
+                stats.dead_ends += 1
+                continue
+            best[child_key] = (child_cost, key, actions)
+            heapq.heappush(frontier, (child_cost + child_h, child_h, pushed, child_cost, child_key, child))
+            pushed += 1
+        stats.max_frontier = max(stats.max_frontier, len(frontier))
+
+    if winning_key is None:
+        # no plan of route-then-boom steps wins, search move by move instead
+        stats.finish(None)
+        return ai.get_winning_sequence(start_node, estimator, stats)
+
+    path = []
+    key = winning_key
+    while best[key][1] is not None:
+        path = best[key][2] + path
+        key = best[key][1]
+    path = [decode_action(action) for action in path]
+    stats.finish(path)
+    estimator.record(stats.nodes_expanded, stats.solution_length)
+    return path
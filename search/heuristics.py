@@ -0,0 +1,159 @@
+"""
+Pluggable heuristic estimators for the A* search.
+
+Every estimator is called with a State and returns an estimate of the number of
+actions (MOVEs and BOOMs) left to win: 0 for a won state, LOST_GAME when white has
+nothing left to boom with, and estimate(state) otherwise. Estimators marked
+admissible never overestimate, so A* with them returns a shortest sequence.
+Each instance counts its evaluations and keeps a record of the searches it has
+been used in, so they can be compared on the same boards with compare_estimators.
+"""
+
+import sys
+
+from engine import N_SQUARES, SQUARE_COORDS, boom_mask, iter_squares
+
+# values for the heuristic
+LOST_GAME = sys.maxsize
+WIN_GAME = 0
+
+
+def _gap(square_a, square_b):
+    """number of squares a piece on square_a must travel to get into the 3x3 blast radius of square_b"""
+    (x_a, y_a), (x_b, y_b) = SQUARE_COORDS[square_a], SQUARE_COORDS[square_b]
+    return max(0, abs(x_a - x_b) - 1) + max(0, abs(y_a - y_b) - 1)
+
+
+# GAPS[a][b] = _gap(a, b), looked up for every (white, black) pair so it's worth precomputing
+GAPS = [[_gap(a, b) for b in range(N_SQUARES)] for a in range(N_SQUARES)]
+
+
+def black_clusters(state):
+    """split the black stacks into clusters, the masks of black stacks that go off together when any one of them does"""
+    clusters = []
+    remaining = state.black
+    while remaining:
+        square = (remaining & -remaining).bit_length() - 1
+        cluster = boom_mask(state.black, square)
+        clusters.append(cluster)
+        remaining &= ~cluster
+    return clusters
+
+
+def cluster_gap(state, cluster):
+    """fewest squares any white piece must travel to get next to a stack in cluster"""
+    return min(GAPS[white][black] for white in iter_squares(state.white) for black in iter_squares(cluster))
+
+
+def moves_to_cover(gap, total_white):
+    """lower bound on the moves needed to carry a piece gap squares, no stack can go further than total_white per move"""
+    return -(-gap // total_white)
+
+
+class Estimator:
+    """Base class for heuristic estimators, subclasses set name and admissible and implement estimate()"""
+    name = None
+    # True if estimate() is a proven lower bound on the number of actions left to win
+    admissible = False
+
+    def __init__(self):
+        # number of states this estimator has been asked about
+        self.evaluations = 0
+        # one (nodes_expanded, solution_length) pair for every search this estimator was used for
+        self.runs = []
+
+    def __call__(self, state):
+        self.evaluations += 1
+        if not state.black:
+            return WIN_GAME
+        if not state.white:
+            return LOST_GAME
+        return self.estimate(state)
+
+    def estimate(self, state):
+        """estimate for a state that still has both white and black stacks on the board"""
+        raise NotImplementedError
+
+    def record(self, nodes_expanded, solution_length):
+        """record the outcome of a search run with this estimator"""
+        self.runs.append((nodes_expanded, solution_length))
+
+    def metrics(self):
+        return {
+            'name': self.name,
+            'admissible': self.admissible,
+            'evaluations': self.evaluations,
+            'nodes_expanded': sum(run[0] for run in self.runs),
+            'runs': list(self.runs),
+        }
+
+
+class BlackPieces(Estimator):
+    """The original heuristic: the number of black pieces left. One boom can take out many, so it overestimates"""
+    name = 'black-pieces'
+    admissible = False
+
+    def estimate(self, state):
+        return state.total_black()
+
+
+class BlackClusters(Estimator):
+    """Number of black clusters that each need a boom of their own. A single white can bridge clusters, so it can overestimate"""
+    name = 'clusters'
+    admissible = False
+
+    def estimate(self, state):
+        return len(black_clusters(state))
+
+
+class BlastDistance(Estimator):
+    """One boom, plus the moves needed to get the closest white piece into the blast radius of any black stack"""
+    name = 'blast-distance'
+    admissible = True
+
+    def estimate(self, state):
+        gap = min(GAPS[white][black] for white in iter_squares(state.white) for black in iter_squares(state.black))
+        return 1 + moves_to_cover(gap, state.total_white())
+
+
+class RelaxedBound(Estimator):
+    """Relaxed problem where pieces can be in several places at once: every black cluster still needs some white
+    piece to reach it, so the cluster furthest from white bounds the moves needed, plus one for the final boom"""
+    name = 'relaxed'
+    admissible = True
+
+    def estimate(self, state):
+        total_white = state.total_white()
+        furthest = max(cluster_gap(state, cluster) for cluster in black_clusters(state))
+        return 1 + moves_to_cover(furthest, total_white)
+
+
+ESTIMATORS = {estimator.name: estimator for estimator in (BlackPieces, BlackClusters, BlastDistance, RelaxedBound)}
+DEFAULT_ESTIMATOR = RelaxedBound.name
+
+
+def get_estimator(name=DEFAULT_ESTIMATOR):
+    """make a fresh estimator from its name"""
+    if name not in ESTIMATORS:
+        raise ValueError("unknown heuristic {!r}, choose from {}".format(name, ', '.join(ESTIMATORS)))
+    return ESTIMATORS[name]()
+
+
+def compare_estimators(init_state, names=None):
+    """solve init_state with each estimator and return their metrics, with 'optimal' set if the solution was
+    as short as the one found by the admissible estimators"""
+    import ai
+
+    results = []
+    for name in names or ESTIMATORS:
+        estimator = get_estimator(name)
+        ai.get_winning_sequence(ai.Node(init_state), estimator)
+        results.append(estimator.metrics())
+
+    # admissible estimators give the shortest solution length to check the others against
+    optimal_lengths = [result['runs'][-1][1] for result in results if result['admissible']]
+    optimal_lengths = [length for length in optimal_lengths if length is not None]
+    for result in results:
+        length = result['runs'][-1][1]
+        result['optimal'] = length is not None and bool(optimal_lengths) and length == min(optimal_lengths)
+    return results
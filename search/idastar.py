@@ -0,0 +1,126 @@
+"""
+Iterative-deepening A* (IDA*) solver.
+
+Depth-first searches with an increasing bound on f = g + h, making and unmaking
+actions on a single mutable board, so memory stays linear in the solution depth
+instead of growing with every node generated like get_winning_sequence's does.
+A small fixed-size transposition table (always-replace, one entry per slot) cuts
+down re-expanding states reached by different move orders within an iteration,
+and carries the lower bounds each iteration proves over to the next one. The table
+can be keyed by canonical key (see symmetry.py) so rotations and reflections of a
+state share an entry; the search itself always stays on the real board.
+"""
+
+import heuristics
+import symmetry
+from engine import decode_action
+from stats import SearchStats
+
+# number of slots in the transposition table, a power of two so the slot is just the low bits of the hash
+TABLE_SIZE = 1 << 16
+
+FOUND = -1
+
+
+class IDAStar:
+    """One IDA* search from a state, see get_winning_sequence"""
+
+    def __init__(self, state, estimator, table_size=TABLE_SIZE, stats=None, use_symmetry=False):
+        # the one board we search on, every action is made and unmade on it
+        self.state = state.copy()
+        self.stats = stats if stats is not None else SearchStats()
+        self.estimator = self.stats.heuristic_function(estimator)
+        self.make = self.stats.make_function()
+        # the encoded actions that got us from the start to self.state
+        self.path = []
+        # slot -> (state key, g, bound, h) of the last state stored there: the g and bound it was searched with,
+        # and the best lower bound we have on its distance to a win
+        self.table = [None] * table_size
+        self.table_mask = table_size - 1
+        self.state_key = symmetry.canonical_key if use_symmetry else symmetry.plain_key
+        self.bound = 0
+
+    def solve(self):
+        """return the list of encoded actions of a shortest win, or None if there isn't one"""
+        h = self.estimator(self.state)
+        if h == heuristics.LOST_GAME:
+            return None
+        self.bound = h
+        while True:
+            result = self.search(0, h)
+            if result == FOUND:
+                return self.path
+            # nothing went over the bound without getting pruned, so there is no win at all
+            if result == heuristics.LOST_GAME:
+                return None
+            self.bound = result
+
+    def search(self, g, h):
+        """depth-first search below self.state, which is g actions from the start and has heuristic h.
+        Returns FOUND, or the smallest f that went over the bound"""
+        key = self.state_key(self.state)[0]
+        slot = hash(key) & self.table_mask
+        entry = self.table[slot]
+        if entry is not None and entry[0] == key:
+            # an earlier search below this state may have proven it's further from a win than h says
+            h = max(h, entry[3])
+            # searched (or being searched) already this iteration from as close to the start, nothing new below
+            if entry[2] == self.bound and entry[1] <= g:
+                self.stats.duplicate_hits += 1
+                return g + h if g + h > self.bound else heuristics.LOST_GAME
+        f = g + h
+        if f > self.bound:
+            return f
+        self.table[slot] = (key, g, self.bound, h)
+        self.stats.nodes_expanded += 1
+        # the path is all the memory we hold on to, the nearest thing IDA* has to a frontier
+        self.stats.max_frontier = max(self.stats.max_frontier, len(self.path))
+
+        # score every child first so the most promising ones are searched first
+        children = []
+        for action in self.stats.successors(self.state):
+            undo = self.make(self.state, action)
+            self.stats.nodes_generated += 1
+            if not self.state.black:
+                self.path.append(action)
+                return FOUND
+            child_h = self.estimator(self.state)
+            self.state.unmake(undo)
+            if child_h != heuristics.LOST_GAME:
+                children.append((child_h, action))
+            else:
+                self.stats.dead_ends += 1
+        children.sort()
+
+        smallest = heuristics.LOST_GAME
+        for child_h, action in children:
+            undo = self.state.make(action)
+            self.path.append(action)
+            result = self.search(g + 1, child_h)
+            if result == FOUND:
+                return FOUND
+            self.path.pop()
+            self.state.unmake(undo)
+            smallest = min(smallest, result)
+
+        # remember what this search proved about the state, it's at least smallest - g actions from a win
+        if smallest != heuristics.LOST_GAME:
+            self.table[slot] = (key, g, self.bound, smallest - g)
+        return smallest
+
+
+def get_winning_sequence(start_node, estimator=None, stats=None, table_size=TABLE_SIZE, use_symmetry=False):
+    """IDA* search from start_node for the shortest sequence of actions that wins, scored by estimator (an
+    admissible one keeps the answer shortest). Returns moves in the same form as ai.get_winning_sequence,
+    and fills in stats like it does. use_symmetry shares transposition table entries between symmetric states"""
+    import ai
+
+    estimator = estimator or ai.heuristic
+    search = IDAStar(start_node.state, estimator, table_size, stats, use_symmetry)
+    search.stats.start()
+    path = search.solve()
+    search.stats.finish(path)
+    estimator.record(search.stats.nodes_expanded, search.stats.solution_length)
+    if path is None:
+        return None
+    return [decode_action(action) for action in path]
@@ -0,0 +1,103 @@
+"""
+Board loading: builds engine States straight from the "white"/"black" stack lists of
+the board JSON, in one pass over the stacks, checking coordinates, heights and that
+no two stacks share a square.
+
+Besides single board files it reads newline-delimited JSON (.jsonl / .ndjson), one
+board object per line, so bulk runs can stream many boards from one file and parse
+each of them exactly once. A line may carry a "name" to label the board by.
+"""
+
+import json
+
+from engine import State, BOARD_SIZE, MAX_HEIGHT, HEIGHT_BITS, SQUARE_BITS, SQUARE_COORDS, iter_squares
+
+# files with these extensions hold one board per line
+STREAM_EXTENSIONS = ('.jsonl', '.ndjson')
+
+
+class BoardError(ValueError):
+    pass
+
+
+def load_state(data):
+    """make a State from parsed board JSON, e.g. {"white": [[1, 0, 1]], "black": [[2, 4, 7]]}
+    where each stack is [n_pieces, x, y]. Raises BoardError if the board isn't valid"""
+    if not isinstance(data, dict):
+        raise BoardError("a board should be a JSON object, not {!r}".format(data))
+    white = black = heights = 0
+    total_white = 0
+    for colour in ('white', 'black'):
+        for stack in data.get(colour, ()):
+            try:
+                n, x, y = stack
+            except (TypeError, ValueError):
+                raise BoardError("{} stack {!r} isn't [n_pieces, x, y]".format(colour, stack))
+            if not all(type(value) is int for value in stack):
+                raise BoardError("{} stack {!r} should be whole numbers".format(colour, stack))
+            if not (0 <= x < BOARD_SIZE and 0 <= y < BOARD_SIZE):
+                raise BoardError("{} stack at {} is off the board".format(colour, (x, y)))
+            if not 0 < n <= MAX_HEIGHT:
+                raise BoardError("{} stack at {} has {} pieces, stacks hold 1 to {}".format(
+                    colour, (x, y), n, MAX_HEIGHT))
+            square = x + y * BOARD_SIZE
+            if (white | black) & SQUARE_BITS[square]:
+                raise BoardError("more than one stack at {}".format((x, y)))
+            if colour == 'white':
+                white |= SQUARE_BITS[square]
+                total_white += n
+            else:
+                black |= SQUARE_BITS[square]
+            heights |= n << (square * HEIGHT_BITS)
+    # white stacks can all merge into one, which has to fit in a square's height field
+    if total_white > MAX_HEIGHT:
+        raise BoardError("white has {} pieces, at most {} fit on one stack".format(total_white, MAX_HEIGHT))
+    return State(white, black, heights)
+
+
+def load_file(path):
+    """load the single board in a JSON file"""
+    with open(path) as file:
+        return load_state(json.load(file))
+
+
+def is_stream(path):
+    return path.endswith(STREAM_EXTENSIONS)
+
+
+def iter_lines(file, path='<stream>'):
+    """yield (name, line) for each board line of a newline-delimited stream without parsing it, so the parsing can
+    happen wherever the board is used (e.g. in a worker process). name is path:line_number"""
+    for line_number, line in enumerate(file, 1):
+        if line.strip():
+            yield '{}:{}'.format(path, line_number), line
+
+
+def parse_line(line, name='<stream>'):
+    """parse one board line of a stream, returning (name, data). The line's own "name" wins if it has one"""
+    try:
+        data = json.loads(line)
+    except ValueError as error:
+        raise BoardError("{}: {}".format(name, error))
+    if not isinstance(data, dict):
+        raise BoardError("{}: a board should be a JSON object, not {!r}".format(name, data))
+    return data.get('name', name), data
+
+
+def iter_boards(file, path='<stream>'):
+    """yield (name, State) for each board in a newline-delimited stream"""
+    for name, line in iter_lines(file, path):
+        name, data = parse_line(line, name)
+        try:
+            yield name, load_state(data)
+        except BoardError as error:
+            raise BoardError("{}: {}".format(name, error))
+
+
+def board_dict(state):
+    """the board as a dict for print_utils.print_board, e.g. {(1, 3): '3w', (4, 7): '1b'}"""
+    board = {}
+    for colour, mask in (('w', state.white), ('b', state.black)):
+        for square in iter_squares(mask):
+            board[SQUARE_COORDS[square]] = str(state.height(square)) + colour
+    return board
@@ -0,0 +1,145 @@
+"""
+Parallel solver: splits the search at the root across a pool of worker processes.
+
+The states a few actions from the start (enough of them to keep every worker busy)
+are found breadth-first, and each becomes a task: an A* search of its own from that
+state, in whichever worker is free. Workers share nothing but the length of the
+shortest win found so far, kept in a shared integer. A worker searches in slices
+of SLICE_NODES expansions and, between slices, gives up on its subtree once the
+smallest f on its frontier (plus the depth of its root) can't beat that length, so
+once a short win turns up the other subtrees are cut off quickly.
+
+Every A* search is admissible, so with optimal on the shortest win over all the
+subtrees is a shortest win overall. With optimal off the first win found is used
+and the rest of the workers are told to stop.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import Value
+
+import heuristics
+from engine import successors, decode_action
+from stats import SearchStats
+
+# A* expansions a worker does between checks of the shared best length
+SLICE_NODES = 200
+# aim for this many tasks per worker, so workers that finish early have more to pick up
+TASKS_PER_WORKER = 4
+# never split deeper than this, the tasks only get smaller and more alike
+MAX_SPLIT_DEPTH = 3
+
+# no win found yet, bigger than any real length
+NO_WIN = 1 << 30
+
+# the shared best length in each worker, set by _init_worker
+_best = None
+
+
+def _init_worker(best):
+    global _best
+    _best = best
+
+
+def split(state, estimator, n_tasks, stats):
+    """breadth-first from state until there are at least n_tasks distinct states at the same depth (or
+    MAX_SPLIT_DEPTH). Returns (win, layer): win is the encoded actions of a shortest win if one turned up on the
+    way, otherwise None, and layer is a list of (state, encoded actions from the start) to search from"""
+    layer = [(state, [])]
+    seen = {state.key()}
+    depth = 0
+    while len(layer) < n_tasks and depth < MAX_SPLIT_DEPTH:
+        next_layer = []
+        for parent, path in layer:
+            stats.nodes_expanded += 1
+            for action in successors(parent):
+                child = parent.copy()
+                child.make(action)
+                stats.nodes_generated += 1
+                if not child.black:
+                    return path + [action], []
+                key = child.key()
+                if key in seen:
+                    stats.duplicate_hits += 1
+                    continue
+                seen.add(key)
+                if estimator(child) == heuristics.LOST_GAME:
+                    stats.dead_ends += 1
+                    continue
+                next_layer.append((child, path + [action]))
+        if not next_layer:
+            break
+        layer = next_layer
+        depth += 1
+    return None, layer
+
+
+def search_subtree(key, depth, heuristic, optimal):
+    """A* search from the state with key, depth actions from the start, in a worker process. Returns (the moves of
+    the win from there or None, the search's stats as a dict). Gives up as soon as the subtree can't beat the
+    shared best length (or, if not optimal, as soon as any worker has found a win)"""
+    import ai
+    from engine import State
+
+    stats = SearchStats()
+    search = ai.AStarSearch(State.from_key(key), heuristics.get_estimator(heuristic), stats)
+    # no frontier means white has nothing to win with from here
+    if not search.frontier or depth + search.store.hs[0] >= _best.value:
+        return None, stats.as_dict()
+    while True:
+        status = search.run(node_limit=SLICE_NODES)
+        if status == ai.SOLVED:
+            length = depth + len(search.winning_path)
+            with _best.get_lock():
+                if length < _best.value:
+                    _best.value = length
+            return search.winning_path, stats.as_dict()
+        if status == ai.NO_SOLUTION:
+            return None, stats.as_dict()
+        best = _best.value
+        if not optimal and best != NO_WIN:
+            return None, stats.as_dict()
+        # the smallest f on the frontier never overestimates, even if the entry is stale
+        if search.frontier and depth + search.frontier[0][0] >= best:
+            return None, stats.as_dict()
+
+
+def get_winning_sequence(start_node, estimator=None, stats=None, workers=None, optimal=True):
+    """search from start_node across workers processes (default: one per core). With optimal, returns a shortest
+    win like ai.get_winning_sequence, otherwise the first win any worker finds. stats gets the totals of all
+    the workers' searches"""
+    import ai
+
+    estimator = estimator or ai.heuristic
+    stats = stats if stats is not None else SearchStats()
+    stats.start()
+    workers = workers or os.cpu_count() or 1
+    win, layer = split(start_node.state, estimator, workers * TASKS_PER_WORKER, stats)
+    if win is not None:
+        win = [decode_action(action) for action in win]
+    best = Value('q', NO_WIN)
+    if win is None and layer:
+        # most promising subtrees first, they're the likeliest to set a tight bound for the rest
+        layer.sort(key=lambda task: len(task[1]) + estimator(task[0]))
+        executor = ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(best,))
+        futures = {}
+        try:
+            futures = {executor.submit(search_subtree, state.key(), len(path), estimator.name, optimal):
+                       [decode_action(action) for action in path] for state, path in layer}
+            for future in as_completed(futures):
+                actions, worker_stats = future.result()
+                for name in ('nodes_generated', 'nodes_expanded', 'duplicate_hits', 'dead_ends'):
+                    setattr(stats, name, getattr(stats, name) + worker_stats[name])
+                stats.max_frontier = max(stats.max_frontier, worker_stats['max_frontier'])
+                if actions is not None and (win is None or len(futures[future]) + len(actions) < len(win)):
+                    win = futures[future] + actions
+        finally:
+            # tells any worker still searching to stop at its next check
+            best.value = 0
+            # and the tasks no worker has picked up yet don't start at all (shutdown's cancel_futures is 3.9+)
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=True)
+    stats.finish(win)
+    estimator.record(stats.nodes_expanded, stats.solution_length)
+    return win
@@ -3,6 +3,13 @@ This module contains some helper functions for printing actions and boards.
 Feel free to use and/or modify them to help you develop your program.
 """
 
+import sys
+
+from engine import BOOM, SQUARE_COORDS
+
+# "(x, y)" for every square, formatted once instead of once per action
+SQUARE_TEXT = [str(coords) for coords in SQUARE_COORDS]
+
 
 def print_move(n, x_a, y_a, x_b, y_b, **kwargs):
     """
@@ -20,6 +27,42 @@ def print_boom(x, y, **kwargs):
     print("BOOM at {}.".format((x, y)), **kwargs)
 
 
+def format_action(action):
+    """
+    Format one action, either an encoded int (see engine.encode_move) or a
+    tuple as returned by engine.decode_action, according to the format
+    instructions, without the line break.
+    """
+    if isinstance(action, int):
+        n, to_square, from_square = action >> 12, (action >> 6) & 0x3f, action & 0x3f
+        if n == 0:
+            return "BOOM at {}.".format(SQUARE_TEXT[from_square])
+        return "MOVE {} from {} to {}.".format(n, SQUARE_TEXT[from_square], SQUARE_TEXT[to_square])
+    if action[1] == BOOM:
+        return "BOOM at {}.".format(action[0])
+    return "MOVE {} from {} to {}.".format(*action[1:])
+
+
+def format_sequence(actions):
+    """
+    Format a whole sequence of actions as one string, one action per line.
+    """
+    return "".join([format_action(action) + "\n" for action in actions])
+
+
+def print_sequence(actions, file=None):
+    """
+    Output a whole sequence of actions with a single write, rather than a
+    print call per action. None (no winning sequence) is output as a comment.
+    """
+    file = file or sys.stdout
+    if actions is None:
+        file.write("# no winning sequence\n")
+    else:
+        file.write(format_sequence(actions))
+    file.flush()
+
+
 def print_board(board_dict, message="", unicode=False, compact=True, **kwargs):
     """
     For help with visualisation and debugging: output a board diagram with
@@ -0,0 +1,148 @@
+"""
+Replay validator for action sequences written out in the text format print_utils
+outputs, one action per line:
+
+    MOVE 1 from (2, 2) to (3, 2).
+    BOOM at (5, 6).
+
+like the test-level-*-out.txt files. Lines starting with # are comments, blank
+lines and anything else that isn't a MOVE or BOOM line (such as the legend at the
+end of test-level-4-out.txt) are skipped, and so is anything after the full stop
+that ends an action. The actions are parsed straight into encoded ints and played
+on the engine from the board they are for, checking each one is legal and that
+black has no pieces left at the end.
+
+Check one board's sequence, or every test-level-N.json in a directory against its
+test-level-N-out.txt:
+
+    python search/replay.py board.json board-out.txt
+    python search/replay.py search/2020-part-a-test-cases
+"""
+
+import argparse
+import glob
+import os
+import re
+import sys
+import time
+
+import engine
+import loader
+
+# an action, up to the full stop that ends it
+ACTION = re.compile(r'\s*(?:MOVE\s+(\d+)\s+from\s+\(\s*(\d+)\s*,\s*(\d+)\s*\)\s+to\s+\(\s*(\d+)\s*,\s*(\d+)\s*\)'
+                    r'|BOOM\s+at\s+\(\s*(\d+)\s*,\s*(\d+)\s*\))\s*\.')
+# a line that is meant to be an action, so it's an error if ACTION doesn't match it
+ACTION_START = re.compile(r'\s*(?:MOVE|BOOM)\b')
+
+# sequence files are named after their board: test-level-1.json and test-level-1-out.txt
+OUT_SUFFIX = '-out.txt'
+
+
+class ParseError(ValueError):
+    pass
+
+
+def _square(x, y, line_number):
+    x, y = int(x), int(y)
+    if not engine.on_board(x, y):
+        raise ParseError("line {}: {} is off the board".format(line_number, (x, y)))
+    return engine.square_index(x, y)
+
+
+def parse_actions(text):
+    """the encoded actions in text, see the module docstring for the format. Raises ParseError for a MOVE or BOOM
+    line that isn't a well formed action"""
+    actions = []
+    match_action = ACTION.match
+    for line_number, line in enumerate(text.splitlines(), 1):
+        match = match_action(line)
+        if match is None:
+            if ACTION_START.match(line):
+                raise ParseError("line {}: can't read the action {!r}".format(line_number, line.strip()))
+            continue
+        n, x_a, y_a, x_b, y_b, x, y = match.groups()
+        if n is None:
+            actions.append(engine.encode_boom(_square(x, y, line_number)))
+        elif int(n) == 0:
+            raise ParseError("line {}: a move has to take at least one piece".format(line_number))
+        else:
+            actions.append(engine.encode_move(int(n), _square(x_a, y_a, line_number),
+                                              _square(x_b, y_b, line_number)))
+    return actions
+
+
+def parse_file(path):
+    with open(path) as file:
+        return parse_actions(file.read())
+
+
+def validate(state, actions):
+    """None if actions (encoded ints or decode_action tuples) is a legal sequence that wins from state, otherwise
+    what's wrong with it"""
+    try:
+        final = engine.replay(state, actions)
+    except engine.IllegalAction as error:
+        return str(error)
+    if final.black:
+        return "black still has {} pieces left".format(final.total_black())
+    return None
+
+
+def validate_file(board_path, out_path):
+    """None if the sequence in out_path wins from the board in board_path, otherwise what's wrong with it (including
+    either file being unreadable or malformed)"""
+    try:
+        actions = parse_file(out_path)
+    except (OSError, UnicodeDecodeError, ParseError) as error:
+        return str(error)
+    try:
+        state = loader.load_file(board_path)
+    except (OSError, ValueError) as error:
+        # ValueError covers loader.BoardError and the board not being JSON at all
+        return "{}: {}".format(board_path, error)
+    return validate(state, actions)
+
+
+def find_pairs(directory):
+    """(board path, sequence path) for every board in directory that has a sequence file next to it"""
+    pairs = []
+    for board_path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        out_path = os.path.splitext(board_path)[0] + OUT_SUFFIX
+        if os.path.exists(out_path):
+            pairs.append((board_path, out_path))
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check action sequences win from their boards")
+    parser.add_argument('paths', nargs='+', metavar='PATH',
+                        help="a board JSON file followed by its sequence file, or directories of boards each with "
+                             "a NAME{} sequence file next to it".format(OUT_SUFFIX))
+    args = parser.parse_args()
+    if all(os.path.isdir(path) for path in args.paths):
+        pairs = [pair for directory in args.paths for pair in find_pairs(directory)]
+    elif len(args.paths) == 2:
+        pairs = [tuple(args.paths)]
+    else:
+        parser.error("give a board and its sequence file, or directories")
+
+    start = time.perf_counter()
+    report = []
+    failed = 0
+    try:
+        for board_path, out_path in pairs:
+            error = validate_file(board_path, out_path)
+            if error is not None:
+                failed += 1
+                report.append("{}: {}\n".format(out_path, error))
+    finally:
+        # whatever was checked gets reported, even if the run is cut short
+        sys.stdout.write(''.join(report))
+    elapsed = time.perf_counter() - start
+    sys.stdout.write("{} of {} sequences valid in {:.3f}s\n".format(len(pairs) - failed, len(pairs), elapsed))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,65 @@
+"""
+Registry of the ways we know to search for a winning sequence. Every solver takes the
+start node, an estimator and optionally a stats.SearchStats to fill in, and returns a
+list of moves (or None if there's no win). The -sym variants treat rotations and
+reflections of a board as the same board, see symmetry.py. weighted, greedy and
+beam give up on the shortest win to find one faster. astar-numpy is A* expanding
+whole batches of nodes at once and needs NumPy, see vectorized.py. parallel
+splits the search across a pool of processes, see parallel.py.
+
+solve runs one by name, going through a cache.SolutionCache if it's given one.
+"""
+
+from functools import partial
+
+import ai
+import beam
+import goal
+import idastar
+import parallel
+import vectorized
+from engine import decode_action
+
+SOLVERS = {
+    'astar': ai.get_winning_sequence,
+    'astar-sym': partial(ai.get_winning_sequence, use_symmetry=True),
+    'idastar': idastar.get_winning_sequence,
+    'idastar-sym': partial(idastar.get_winning_sequence, use_symmetry=True),
+    'goal': goal.get_winning_sequence,
+    'weighted': partial(ai.get_winning_sequence, weight=ai.DEFAULT_WEIGHT),
+    'greedy': partial(ai.get_winning_sequence, weight=None),
+    'beam': beam.get_winning_sequence,
+    'astar-numpy': vectorized.get_winning_sequence,
+    'parallel': parallel.get_winning_sequence,
+}
+DEFAULT_SOLVER = 'astar'
+# solvers that find a shortest win when their heuristic is admissible, so their answers are exact in the cache
+EXACT_SOLVERS = ('astar', 'astar-sym', 'idastar', 'idastar-sym', 'astar-numpy', 'parallel')
+# solvers that stop at states the cache has exact answers for, instead of searching on below them
+CACHE_SOLVERS = ('astar', 'astar-sym', 'weighted', 'greedy')
+
+
+def solve(name, start_node, estimator, stats=None, cache=None, **options):
+    """run the solver called name, passing it any options (e.g. weight=3 for weighted, width=16 for beam).
+    With a cache, a board already in it is answered from it straight away, and the answer is stored in it
+    afterwards (exact ones along with the distance of every position on the way). Only exact solvers' answers
+    that there's no win are stored"""
+    solver = partial(SOLVERS[name], **options)
+    if cache is None:
+        return solver(start_node, estimator, stats)
+    exact = name in EXACT_SOLVERS and estimator.admissible
+    entry = cache.lookup(start_node.state, exact)
+    if entry is not None:
+        sequence = None if entry[0] is None else [decode_action(action) for action in entry[0]]
+        if stats is not None:
+            stats.start()
+            stats.finish(sequence)
+        return sequence
+    if name in CACHE_SOLVERS:
+        sequence = solver(start_node, estimator, stats, cache=cache)
+    else:
+        sequence = solver(start_node, estimator, stats)
+    # a solver that isn't exact can miss a win that is there, so only its wins are worth keeping
+    if sequence is not None or exact:
+        cache.store(start_node.state, sequence, exact, positions=exact)
+    return sequence
@@ -0,0 +1,114 @@
+"""
+Instrumentation for the searches. Pass a SearchStats to a solver and it gets filled
+in with node counts, duplicate hits, frontier size and boom chain lengths; with
+timing on it also times successor generation, booms and heuristic evaluation,
+which costs a little on every node so it's off unless asked for.
+"""
+
+import cProfile
+import json
+import pstats
+import time
+
+from engine import State, successors
+
+
+class SearchStats:
+    """Counters and timers for one search"""
+
+    def __init__(self, timing=False):
+        # wrap the hot calls in timers, see timed_successors, timed_make and timed_heuristic
+        self.timing = timing
+        self.nodes_generated = 0
+        self.nodes_expanded = 0
+        # children thrown away because their state was already expanded or queued at least as shallow
+        self.duplicate_hits = 0
+        # children thrown away because white has no pieces left
+        self.dead_ends = 0
+        self.max_frontier = 0
+        # number of stacks a boom removed -> how many booms removed that many (only counted with timing on)
+        self.boom_chains = {}
+        self.successor_time = 0.0
+        self.boom_time = 0.0
+        self.heuristic_time = 0.0
+        self.total_time = 0.0
+        self.solution_length = None
+
+    def as_dict(self):
+        stats = dict(vars(self))
+        stats['boom_chains'] = {str(length): count for length, count in sorted(self.boom_chains.items())}
+        if self.total_time:
+            stats['nodes_per_second'] = self.nodes_generated / self.total_time
+        return stats
+
+    def dump(self, path):
+        """write the stats to path as JSON"""
+        with open(path, 'w') as file:
+            json.dump(self.as_dict(), file, indent=4)
+
+    def start(self):
+        # total_time has the start time taken off it until finish() adds the end time back, so a search that
+        # hands over to another one (timing the same stats) adds up the time of both
+        self.total_time -= time.perf_counter()
+
+    def finish(self, solution):
+        if self.total_time < 0:
+            self.total_time += time.perf_counter()
+        self.solution_length = None if solution is None else len(solution)
+
+    def successors(self, state):
+        """engine.successors, timed if timing is on"""
+        if not self.timing:
+            return successors(state)
+        return self.timed_successors(state)
+
+    def timed_successors(self, state):
+        generator = successors(state)
+        while True:
+            start_time = time.perf_counter()
+            try:
+                action = next(generator)
+            except StopIteration:
+                self.successor_time += time.perf_counter() - start_time
+                return
+            self.successor_time += time.perf_counter() - start_time
+            yield action
+
+    def make_function(self):
+        """State.make, or a version that times booms and records their chain lengths if timing is on"""
+        return self.timed_make if self.timing else State.make
+
+    def timed_make(self, state, action):
+        # anything that isn't a boom is cheap enough not to time
+        if action >> 12:
+            return state.make(action)
+        occupied = state.white | state.black
+        start_time = time.perf_counter()
+        undo = state.make(action)
+        self.boom_time += time.perf_counter() - start_time
+        chain = bin(occupied & ~(state.white | state.black)).count('1')
+        self.boom_chains[chain] = self.boom_chains.get(chain, 0) + 1
+        return undo
+
+    def heuristic_function(self, estimator):
+        """estimator, or a wrapper around it that times every evaluation if timing is on"""
+        if not self.timing:
+            return estimator
+
+        def timed_heuristic(state):
+            start_time = time.perf_counter()
+            h = estimator(state)
+            self.heuristic_time += time.perf_counter() - start_time
+            return h
+        return timed_heuristic
+
+
+def profile(function, *args, path=None, limit=25, **kwargs):
+    """run function(*args, **kwargs) under cProfile, printing the limit most expensive calls and saving the
+    raw profile to path (for snakeviz, pstats etc.) if given. Returns what function returned"""
+    profiler = cProfile.Profile()
+    result = profiler.runcall(function, *args, **kwargs)
+    if path is not None:
+        profiler.dump_stats(path)
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(limit)
+    return result
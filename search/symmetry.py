@@ -0,0 +1,155 @@
+"""
+The 8 symmetries of the board (rotations and reflections) and canonical state keys.
+
+The rules don't care which way up the board is, so a position and any of its
+mirror images or rotations are the same distance from a win. canonical_key picks
+the smallest of the 8 keys as the one every member of the family is stored under,
+and says which symmetry took the state there so actions found on the canonical
+board can be mapped back onto the real one.
+
+Symmetry s applies a horizontal flip (x -> 7 - x) if bit 0 of s is set, then a
+vertical flip (y -> 7 - y) if bit 1 is set, then a transpose (x <-> y) if bit 2
+is set. The transforms are done on whole masks and packed height arrays at once,
+with byte reversals for the flips and delta swaps for the transpose. Heights are
+the top bits of a key, so canonical_key only transforms the colour masks for the
+symmetries whose heights come out smallest (usually just one).
+"""
+
+from array import array
+
+from engine import State, BOARD_SIZE, N_SQUARES, HEIGHT_BITS, SQUARE_COORDS, square_index
+
+N_SYMMETRIES = 8
+IDENTITY = 0
+
+# bytes needed for a mask and for a packed height array, and how many bytes of the height array make one row
+MASK_BYTES = N_SQUARES // 8
+HEIGHTS_BYTES = N_SQUARES * HEIGHT_BITS // 8
+ROW_BYTES = HEIGHTS_BYTES // BOARD_SIZE
+
+
+def _transform_coords(symmetry, x, y):
+    if symmetry & 1:
+        x = BOARD_SIZE - 1 - x
+    if symmetry & 2:
+        y = BOARD_SIZE - 1 - y
+    if symmetry & 4:
+        x, y = y, x
+    return x, y
+
+
+# PERMUTATIONS[s][square] is where symmetry s takes square
+PERMUTATIONS = [[square_index(*_transform_coords(symmetry, *SQUARE_COORDS[square])) for square in range(N_SQUARES)]
+                for symmetry in range(N_SYMMETRIES)]
+_INDEX = {tuple(permutation): symmetry for symmetry, permutation in enumerate(PERMUTATIONS)}
+# INVERSES[s] undoes symmetry s
+INVERSES = [_INDEX[tuple(sorted(range(N_SQUARES), key=permutation.__getitem__))] for permutation in PERMUTATIONS]
+# COMPOSE[a][b] is the symmetry that does a and then b
+COMPOSE = [[_INDEX[tuple(PERMUTATIONS[b][PERMUTATIONS[a][square]] for square in range(N_SQUARES))]
+            for b in range(N_SYMMETRIES)] for a in range(N_SYMMETRIES)]
+
+# byte translation tables: reverse the 8 bits of a mask row, swap the 2 heights packed in a byte
+REVERSE_BITS = bytes(int('{:08b}'.format(byte)[::-1], 2) for byte in range(256))
+SWAP_NIBBLES = bytes(((byte & 0xf) << 4) | (byte >> 4) for byte in range(256))
+
+
+def _spread(mask):
+    """widen every bit of a square mask into a whole HEIGHT_BITS field of a packed height array"""
+    return sum(((1 << HEIGHT_BITS) - 1) << (square * HEIGHT_BITS) for square in range(N_SQUARES) if mask >> square & 1)
+
+
+# delta swaps that transpose an 8x8 board, as (mask, shift) pairs for square masks and for packed heights
+_TRANSPOSE_STEPS = [(0x0f0f0f0f00000000, 28), (0x3333000033330000, 14), (0x5500550055005500, 7)]
+MASK_TRANSPOSE = _TRANSPOSE_STEPS
+HEIGHTS_TRANSPOSE = [(_spread(mask), shift * HEIGHT_BITS) for mask, shift in _TRANSPOSE_STEPS]
+
+
+def _transpose(value, steps):
+    for mask, shift in steps:
+        t = mask & (value ^ (value << shift))
+        value ^= t ^ (t >> shift)
+    return value
+
+
+def _flip_x_mask(mask):
+    return int.from_bytes(mask.to_bytes(MASK_BYTES, 'little').translate(REVERSE_BITS), 'little')
+
+
+def _flip_y_mask(mask):
+    return int.from_bytes(mask.to_bytes(MASK_BYTES, 'little'), 'big')
+
+
+def _flip_y_heights(heights):
+    # a row of heights is 4 bytes, the size of an unsigned int array item
+    rows = array('I', heights.to_bytes(HEIGHTS_BYTES, 'little'))
+    rows.reverse()
+    return int.from_bytes(rows.tobytes(), 'little')
+
+
+def _flip_xy_heights(heights):
+    # reversing every byte and swapping the two heights in each flips both ways at once
+    return int.from_bytes(heights.to_bytes(HEIGHTS_BYTES, 'little').translate(SWAP_NIBBLES), 'big')
+
+
+def height_images(heights):
+    """the packed heights of all 8 symmetric images, indexed by symmetry"""
+    flipped_xy = _flip_xy_heights(heights)
+    images = [heights, _flip_y_heights(flipped_xy), _flip_y_heights(heights), flipped_xy]
+    return images + [_transpose(image, HEIGHTS_TRANSPOSE) for image in images]
+
+
+def mask_image(mask, symmetry):
+    """mask with symmetry applied to it"""
+    if symmetry & 1:
+        mask = _flip_x_mask(mask)
+    if symmetry & 2:
+        mask = _flip_y_mask(mask)
+    if symmetry & 4:
+        mask = _transpose(mask, MASK_TRANSPOSE)
+    return mask
+
+
+def image_key(state, symmetry, heights):
+    """the key of state with symmetry applied to it, given the heights image"""
+    return mask_image(state.white, symmetry) | (mask_image(state.black, symmetry) << N_SQUARES) | \
+        (heights << (2 * N_SQUARES))
+
+
+def transformed_keys(state):
+    """the keys of all 8 symmetric images of state, indexed by symmetry"""
+    return [image_key(state, symmetry, heights) for symmetry, heights in enumerate(height_images(state.heights))]
+
+
+def canonical_key(state):
+    """(key, symmetry): the smallest key of any symmetric image of state, and the symmetry that gives it"""
+    images = height_images(state.heights)
+    smallest = min(images)
+    best = None
+    for symmetry, heights in enumerate(images):
+        if heights == smallest:
+            key = image_key(state, symmetry, heights)
+            if best is None or key < best[0]:
+                best = key, symmetry
+    return best
+
+
+def plain_key(state):
+    """(key, IDENTITY), for searches that don't reduce by symmetry"""
+    return state.key(), IDENTITY
+
+
+def transform_state(state, symmetry):
+    return State.from_key(transformed_keys(state)[symmetry])
+
+
+def transform_action(action, symmetry):
+    """map an encoded action onto the board transformed by symmetry"""
+    if symmetry == IDENTITY:
+        return action
+    permutation = PERMUTATIONS[symmetry]
+    from_square = permutation[action & 0x3f]
+    if not action >> 12:
+        # a boom is just its square, see engine.encode_boom
+        return from_square
+    to_square = permutation[(action >> 6) & 0x3f]
+    return (action & ~0xfff) | (to_square << 6) | from_square
@@ -0,0 +1,22 @@
+import os
+import random
+import sys
+
+# the modules import each other as top-level modules, like when running python search
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generator  # noqa: E402
+import loader  # noqa: E402
+
+
+def random_states(count, seed=0, max_white=4, max_black=10, max_height=3):
+    """count random boards as States, a mix of spread out and clustered ones. They aren't checked for solvability,
+    and can have more pieces than the game allows, as long as the white ones fit on one stack"""
+    rng = random.Random(seed)
+    states = []
+    while len(states) < count:
+        n_white = rng.randint(1, max_white)
+        data = generator.random_board(rng, n_white, rng.randint(1, max_black), min(max_height, 15 // n_white),
+                                      rng.choice((0.0, 0.5, 1.0)))
+        states.append(loader.load_state(data))
+    return states
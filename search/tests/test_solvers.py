@@ -0,0 +1,26 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+import ai  # noqa: E402
+import generator  # noqa: E402
+import heuristics  # noqa: E402
+import loader  # noqa: E402
+import solvers  # noqa: E402
+
+# boards A* solves within 100 expansions, so IDA* and the process pool don't make the run crawl
+BOARDS = [board for board in generator.build_corpus(250, seed=17, node_limit=100, black=(1, 4))
+          if board['bucket'] == 'easy'][:150]
+
+
+@pytest.mark.parametrize('board', BOARDS, ids=[board['name'] for board in BOARDS])
+def test_exact_solvers_agree(board):
+    estimator = heuristics.get_estimator()
+    lengths = {}
+    for name in solvers.EXACT_SOLVERS:
+        options = {'workers': 2} if name == 'parallel' else {}
+        sequence = solvers.solve(name, ai.Node(loader.load_state(board['data'])), estimator, **options)
+        assert sequence is not None, name
+        lengths[name] = len(sequence)
+    assert set(lengths.values()) == {board['length']}, lengths
+    assert board['length'] <= len(board['witness'])
@@ -0,0 +1,71 @@
+import pytest
+
+import symmetry
+from engine import State, N_SQUARES, HEIGHT_BITS, SQUARE_BITS, MAX_HEIGHT, successors, iter_squares
+from conftest import random_states
+
+STATES = random_states(2000, seed=13)
+
+
+def moved_key(state, sym):
+    """the key of state with every stack moved square by square to where sym takes it, to check the bit tricks
+    against"""
+    white = black = heights = 0
+    for square in iter_squares(state.white | state.black):
+        image = symmetry.PERMUTATIONS[sym][square]
+        if state.white & SQUARE_BITS[square]:
+            white |= SQUARE_BITS[image]
+        else:
+            black |= SQUARE_BITS[image]
+        heights |= state.height(square) << (image * HEIGHT_BITS)
+    return State(white, black, heights).key()
+
+
+def test_inverses_and_compose():
+    for sym in range(symmetry.N_SYMMETRIES):
+        inverse = symmetry.INVERSES[sym]
+        assert symmetry.COMPOSE[sym][inverse] == symmetry.IDENTITY
+        for square in range(N_SQUARES):
+            assert symmetry.PERMUTATIONS[inverse][symmetry.PERMUTATIONS[sym][square]] == square
+        for other in range(symmetry.N_SYMMETRIES):
+            both = symmetry.COMPOSE[sym][other]
+            for square in range(N_SQUARES):
+                assert symmetry.PERMUTATIONS[both][square] == \
+                    symmetry.PERMUTATIONS[other][symmetry.PERMUTATIONS[sym][square]]
+
+
+@pytest.mark.parametrize('state', STATES)
+def test_transformed_keys(state):
+    keys = symmetry.transformed_keys(state)
+    assert keys == [moved_key(state, sym) for sym in range(symmetry.N_SYMMETRIES)]
+    assert keys[symmetry.IDENTITY] == state.key()
+
+
+@pytest.mark.parametrize('state', STATES)
+def test_canonical_key(state):
+    key, sym = symmetry.canonical_key(state)
+    assert key == min(symmetry.transformed_keys(state))
+    assert symmetry.transform_state(state, sym).key() == key
+    # every image of the state is stored under the same key
+    for other in range(symmetry.N_SYMMETRIES):
+        assert symmetry.canonical_key(symmetry.transform_state(state, other))[0] == key
+
+
+@pytest.mark.parametrize('state', STATES[:300])
+def test_transform_action(state):
+    for sym in range(symmetry.N_SYMMETRIES):
+        image = symmetry.transform_state(state, sym)
+        assert sorted(successors(image)) == sorted(symmetry.transform_action(action, sym)
+                                                   for action in successors(state))
+        for action in successors(state):
+            child = state.copy()
+            child.make(action)
+            image_child = image.copy()
+            image_child.make(symmetry.transform_action(action, sym))
+            assert image_child.key() == symmetry.transform_state(child, sym).key()
+
+
+def test_tallest_stacks():
+    corner = N_SQUARES - 1
+    state = State(SQUARE_BITS[0], SQUARE_BITS[corner], MAX_HEIGHT | (MAX_HEIGHT << (corner * HEIGHT_BITS)))
+    assert symmetry.transformed_keys(state) == [moved_key(state, sym) for sym in range(symmetry.N_SYMMETRIES)]
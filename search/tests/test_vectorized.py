@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip('numpy')
+
+import heuristics  # noqa: E402
+import vectorized  # noqa: E402
+from engine import State, successors  # noqa: E402
+from conftest import random_states  # noqa: E402
+
+STATES = random_states(300, seed=17)
+
+
+def scalar_children(state):
+    """(action, child key) for every child engine.successors gives"""
+    children = []
+    for action in successors(state):
+        child = state.copy()
+        child.make(action)
+        children.append((action, child.key()))
+    return children
+
+
+def test_keys_round_trip():
+    keys = [state.key() for state in STATES]
+    assert vectorized.Batch.from_keys(keys).keys() == keys
+
+
+def test_expand_matches_successors():
+    children, parents, actions = vectorized.expand(vectorized.Batch.from_keys([state.key() for state in STATES]))
+    batched = [[] for _ in STATES]
+    for key, parent, action in zip(children.keys(), parents.tolist(), actions.tolist()):
+        batched[parent].append((action, key))
+    for state, found in zip(STATES, batched):
+        assert sorted(found) == sorted(scalar_children(state))
+
+
+@pytest.mark.parametrize('name', sorted(vectorized.ESTIMATORS))
+def test_estimators_match_scalar(name):
+    estimator = heuristics.get_estimator(name)
+    # the children cover won and lost states as well as the boards themselves
+    keys = [state.key() for state in STATES] + [key for state in STATES for _, key in scalar_children(state)]
+    estimates = vectorized.ESTIMATORS[name](vectorized.Batch.from_keys(keys)).tolist()
+    assert estimates == [estimator(State.from_key(key)) for key in keys]
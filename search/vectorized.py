@@ -0,0 +1,288 @@
+"""
+A* with batched, vectorized node expansion (needs NumPy).
+
+Instead of expanding one node at a time, every node on the frontier with the
+smallest f (up to batch_size of them) is expanded at once. The parents are
+unpacked into NumPy arrays, one row per parent: a uint64 occupancy mask per
+colour and 64 stack heights. Every child of every parent is then made in one go:
+the legal moves come out of a (parents x (from, to) square pairs) mask, the
+booms' chain reactions are bitboard dilations repeated until nothing more goes
+off, and the win check and heuristic are array operations over all the children.
+Only the transposition table lookups and heap pushes are left per child.
+
+Expanding a whole f layer at once keeps the answer a shortest win: every win
+found in the layer is exactly f long, and nothing else can be shorter. Only the
+heuristics in ESTIMATORS are implemented here.
+"""
+
+import heapq
+
+import heuristics
+from engine import BOARD_SIZE, N_SQUARES, HEIGHT_BITS, KEY_BYTES, STEPS
+from stats import SearchStats
+
+DEFAULT_BATCH_SIZE = 1024
+
+_tables = None
+
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise ImportError("the vectorized solver needs NumPy, install it with `pip install numpy`")
+    return numpy
+
+
+class Tables:
+    """the precomputed arrays the batched expansion needs, made on first use so importing this doesn't need NumPy"""
+
+    def __init__(self):
+        np = self.np = _numpy()
+        self.shifts = np.arange(N_SQUARES, dtype=np.uint64)
+        self.bits = np.uint64(1) << self.shifts
+        not_left = sum(1 << square for square in range(N_SQUARES) if square % BOARD_SIZE != 0)
+        not_right = sum(1 << square for square in range(N_SQUARES) if square % BOARD_SIZE != BOARD_SIZE - 1)
+        self.not_left = np.uint64(not_left)
+        self.not_right = np.uint64(not_right)
+        # every (from, to) pair of squares a stack could move between, and how many steps apart they are
+        pairs = [(a, b, STEPS[a][b]) for a in range(N_SQUARES) for b in range(N_SQUARES) if STEPS[a][b]]
+        self.pair_from = np.array([a for a, b, steps in pairs], dtype=np.intp)
+        self.pair_to = np.array([b for a, b, steps in pairs], dtype=np.intp)
+        self.pair_steps = np.array([steps for a, b, steps in pairs], dtype=np.uint8)
+
+    def square_bits(self, masks):
+        """(n, 64) booleans of which squares are set in each mask"""
+        return ((masks[:, None] >> self.shifts) & self.np.uint64(1)).astype(bool)
+
+    def spread(self, masks):
+        """each mask grown by one square in the 4 move directions"""
+        one, eight = self.np.uint64(1), self.np.uint64(BOARD_SIZE)
+        return masks | ((masks << one) & self.not_left) | ((masks >> one) & self.not_right) | \
+            (masks << eight) | (masks >> eight)
+
+    def blast(self, masks):
+        """each mask grown by one square in all 8 directions, i.e. every square a boom on one of them hits"""
+        one, eight = self.np.uint64(1), self.np.uint64(BOARD_SIZE)
+        row = masks | ((masks << one) & self.not_left) | ((masks >> one) & self.not_right)
+        return row | (row << eight) | (row >> eight)
+
+
+def tables():
+    global _tables
+    if _tables is None:
+        _tables = Tables()
+    return _tables
+
+
+class Batch:
+    """A batch of states as arrays: white and black occupancy masks and a (n, 64) array of stack heights"""
+
+    def __init__(self, white, black, heights):
+        self.white = white
+        self.black = black
+        self.heights = heights
+
+    def __len__(self):
+        return len(self.white)
+
+    @classmethod
+    def from_keys(cls, keys):
+        """unpack a list of State.key() ints"""
+        np = tables().np
+        data = np.frombuffer(b''.join(key.to_bytes(KEY_BYTES, 'little') for key in keys),
+                             dtype=np.uint8).reshape(len(keys), KEY_BYTES)
+        masks = data[:, :16].copy().view('<u8')
+        packed = data[:, 16:]
+        heights = np.empty((len(keys), N_SQUARES), dtype=np.uint8)
+        heights[:, 0::2] = packed & 0xf
+        heights[:, 1::2] = packed >> HEIGHT_BITS
+        return cls(masks[:, 0].astype(np.uint64), masks[:, 1].astype(np.uint64), heights)
+
+    def keys(self):
+        """the State.key() int of every state"""
+        np = tables().np
+        data = np.empty((len(self), KEY_BYTES), dtype=np.uint8)
+        data[:, :8] = self.white.astype('<u8').view(np.uint8).reshape(-1, 8)
+        data[:, 8:16] = self.black.astype('<u8').view(np.uint8).reshape(-1, 8)
+        data[:, 16:] = self.heights[:, 0::2] | (self.heights[:, 1::2] << HEIGHT_BITS)
+        buffer = data.tobytes()
+        return [int.from_bytes(buffer[i:i + KEY_BYTES], 'little') for i in range(0, len(buffer), KEY_BYTES)]
+
+    def total_white(self):
+        return (self.heights * tables().square_bits(self.white)).sum(axis=1, dtype=tables().np.int64)
+
+    def total_black(self):
+        return (self.heights * tables().square_bits(self.black)).sum(axis=1, dtype=tables().np.int64)
+
+
+def expand(batch):
+    """every child of every state in batch: (children, parent row of each child, encoded action of each child),
+    the booms first and then the moves, like engine.successors"""
+    t = tables()
+    np = t.np
+    white_bits = t.square_bits(batch.white)
+    black_bits = t.square_bits(batch.black)
+
+    # booms, one for each white stack, chain reactions spread through every occupied square they reach
+    boom_parents, boom_squares = np.nonzero(white_bits)
+    occupied = (batch.white | batch.black)[boom_parents]
+    removed = t.bits[boom_squares]
+    while True:
+        grown = removed | (t.blast(removed) & occupied)
+        if np.array_equal(grown, removed):
+            break
+        removed = grown
+    kept = ~removed
+    boom_heights = batch.heights[boom_parents] * ~t.square_bits(removed)
+    booms = Batch(batch.white[boom_parents] & kept, batch.black[boom_parents] & kept, boom_heights)
+
+    # moves: a (from, to) pair is legal for a parent with a white stack on from, tall enough to reach to, and no
+    # black stack on to. Each legal pair is then repeated once for each number of pieces the stack can move
+    from_heights = batch.heights[:, t.pair_from]
+    legal = white_bits[:, t.pair_from] & ~black_bits[:, t.pair_to] & (from_heights >= t.pair_steps)
+    pair_parents, pairs = np.nonzero(legal)
+    counts = from_heights[pair_parents, pairs].astype(np.intp)
+    move_parents = np.repeat(pair_parents, counts)
+    from_squares = np.repeat(t.pair_from[pairs], counts)
+    to_squares = np.repeat(t.pair_to[pairs], counts)
+    n_pieces = (np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1).astype(np.uint8)
+    rows = np.arange(len(move_parents))
+    move_heights = batch.heights[move_parents]
+    move_heights[rows, from_squares] -= n_pieces
+    move_heights[rows, to_squares] += n_pieces
+    move_white = batch.white[move_parents] | t.bits[to_squares]
+    move_white &= ~np.where(move_heights[rows, from_squares] == 0, t.bits[from_squares], np.uint64(0))
+    moves = Batch(move_white, batch.black[move_parents], move_heights)
+
+    children = Batch(np.concatenate([booms.white, moves.white]), np.concatenate([booms.black, moves.black]),
+                     np.concatenate([booms.heights, moves.heights]))
+    parents = np.concatenate([boom_parents, move_parents])
+    actions = np.concatenate([boom_squares.astype(np.int64),
+                              (n_pieces.astype(np.int64) << 12) | (to_squares << 6) | from_squares])
+    return children, parents, actions
+
+
+def black_pieces(batch):
+    """heuristics.BlackPieces for every state in batch"""
+    estimates = batch.total_black()
+    estimates[(batch.white == 0) & (batch.black != 0)] = heuristics.LOST_GAME
+    return estimates
+
+
+def relaxed(batch):
+    """heuristics.RelaxedBound for every state in batch: 1 + ceil(gap / total white) for the black cluster
+    furthest from white. The gaps come from growing the white squares one step at a time (the squares reach
+    covers after k steps are within k moves of a white piece) and flood filling the black clusters that touch
+    them, until every black stack is covered"""
+    t = tables()
+    np = t.np
+    total_white = batch.total_white()
+    reach = batch.white
+    covered = np.zeros(len(batch), dtype=np.uint64)
+    furthest = np.zeros(len(batch), dtype=np.int64)
+    # states with a colour missing have no gap to measure
+    done = (batch.black == 0) | (batch.white == 0)
+    gap = 0
+    while not done.all():
+        # black stacks within gap of a white piece, and the rest of their clusters
+        covered |= t.blast(reach) & batch.black
+        while True:
+            grown = covered | (t.blast(covered) & batch.black)
+            if np.array_equal(grown, covered):
+                break
+            covered = grown
+        finished = ~done & (covered == batch.black)
+        furthest[finished] = gap
+        done |= finished
+        reach = t.spread(reach)
+        gap += 1
+    estimates = 1 + (furthest + np.maximum(total_white, 1) - 1) // np.maximum(total_white, 1)
+    estimates[batch.white == 0] = heuristics.LOST_GAME
+    estimates[batch.black == 0] = heuristics.WIN_GAME
+    return estimates
+
+
+ESTIMATORS = {
+    'black-pieces': black_pieces,
+    'relaxed': relaxed,
+}
+
+
+def get_winning_sequence(start_node, estimator=None, stats=None, batch_size=DEFAULT_BATCH_SIZE):
+    """A* search from start_node like ai.get_winning_sequence, but expanding a batch of nodes at a time with
+    NumPy. estimator has to be one of the kinds in ESTIMATORS; it's only used for its name and counts"""
+    import ai
+
+    estimator = estimator or ai.heuristic
+    if estimator.name not in ESTIMATORS:
+        raise ValueError("the vectorized solver can't compute the {!r} heuristic, only {}".format(
+            estimator.name, ', '.join(ESTIMATORS)))
+    evaluate = ESTIMATORS[estimator.name]
+    stats = stats if stats is not None else SearchStats()
+    stats.start()
+    store = ai.NodeStore()
+    start_key = start_node.state.key()
+    h = int(evaluate(Batch.from_keys([start_key]))[0])
+    explored = set()
+    frontier = []
+    winning_path = None
+    if h == heuristics.WIN_GAME:
+        winning_path = []
+    elif h == heuristics.LOST_GAME:
+        # white has nothing to win with, the empty frontier ends the search straight away
+        stats.dead_ends += 1
+    else:
+        start = store.add(start_key, -1, 0, 0, h)
+        frontier.append((h, h, start))
+
+    while frontier and winning_path is None:
+        # every node with the smallest f, up to batch_size of them, skipping stale entries
+        nodes = []
+        layer = None
+        while frontier and len(nodes) < batch_size:
+            f, h, node = frontier[0]
+            if layer is not None and f != layer:
+                break
+            heapq.heappop(frontier)
+            if node in explored or f != store.depths[node] + h:
+                continue
+            layer = f
+            explored.add(node)
+            nodes.append(node)
+        if not nodes:
+            break
+
+        children, parents, actions = expand(Batch.from_keys([store.keys[node] for node in nodes]))
+        estimates = evaluate(children)
+        stats.nodes_expanded += len(nodes)
+        stats.nodes_generated += len(children)
+        estimator.evaluations += len(children)
+
+        wins = (children.black == 0).nonzero()[0]
+        if len(wins):
+            win = wins[0]
+            winning_path = store.path(nodes[parents[win]], [int(actions[win])])
+            break
+        lost = estimates == heuristics.LOST_GAME
+        stats.dead_ends += int(lost.sum())
+        alive = (~lost).nonzero()[0]
+        keys = Batch(children.white[alive], children.black[alive], children.heights[alive]).keys()
+        for key, parent, action, h in zip(keys, parents[alive].tolist(), actions[alive].tolist(),
+                                          estimates[alive].tolist()):
+            parent = nodes[parent]
+            depth = store.depths[parent] + 1
+            node = store.ids.get(key)
+            if node is None:
+                node = store.add(key, parent, action, depth, h)
+            elif node in explored or store.depths[node] <= depth:
+                stats.duplicate_hits += 1
+                continue
+            else:
+                store.reparent(node, parent, action, depth)
+            heapq.heappush(frontier, (depth + store.hs[node], store.hs[node], node))
+        stats.max_frontier = max(stats.max_frontier, len(frontier))
+
+    stats.finish(winning_path)
+    estimator.record(stats.nodes_expanded, stats.solution_length)
+    return winning_path